@@ -9,8 +9,27 @@ Docker 环境检测工具模块
 """
 
 import os
+from functools import lru_cache
+from typing import Optional
 
 
+def _cgroup_contains_docker() -> Optional[bool]:
+    """检查 /proc/1/cgroup 是否包含 docker 或 containerd 关键字。
+
+    Returns:
+        Optional[bool]: 包含返回 True，不包含返回 False，文件不可读返回 None
+    """
+    try:
+        # 只读取开头 4 KiB 并以字节匹配，省去整文件读取与 UTF-8 解码
+        with open("/proc/1/cgroup", "rb") as f:
+            head = f.read(4096)
+            return b"docker" in head or b"containerd" in head
+    except (FileNotFoundError, PermissionError):
+        # 如果文件不存在或没有权限读取，忽略此方法
+        return None
+
+
+@lru_cache(maxsize=1)
 def is_docker_environment() -> bool:
     """检测是否在 Docker 容器中运行
     
@@ -19,6 +38,8 @@ def is_docker_environment() -> bool:
     2. 检查 /.dockerenv 文件是否存在
     3. 检查 /proc/1/cgroup 文件内容
     
+    运行环境在进程生命周期内不会变化，结果会被缓存，只检测一次。
+    
     Returns:
         bool: 如果在 Docker 容器中运行返回 True，否则返回 False
         
@@ -41,15 +62,8 @@ def is_docker_environment() -> bool:
     
     # 方法3: 检查 cgroup 信息
     # 通过检查 /proc/1/cgroup 文件内容来判断是否在容器中
-    try:
-        with open("/proc/1/cgroup", "r") as f:
-            content = f.read()
-            # 如果包含 docker 或 containerd 关键字，说明在容器中
-            if "docker" in content or "containerd" in content:
-                return True
-    except (FileNotFoundError, PermissionError):
-        # 如果文件不存在或没有权限读取，忽略此方法
-        pass
+    if _cgroup_contains_docker():
+        return True
     
     # 所有检测方法都未发现 Docker 环境特征
     return False
@@ -71,27 +85,13 @@ def get_environment_info() -> dict:
         }
     """
     info = {
-        'is_docker': False,
+        # 综合判断复用缓存的检测结果
+        'is_docker': is_docker_environment(),
         'docker_run_env': os.getenv("DOCKER_RUN", "false"),
         'dockerenv_file_exists': os.path.exists("/.dockerenv"),
-        'cgroup_contains_docker': False
+        'cgroup_contains_docker': _cgroup_contains_docker()
     }
     
-    # 检查 cgroup 信息
-    try:
-        with open("/proc/1/cgroup", "r") as f:
-            content = f.read()
-            info['cgroup_contains_docker'] = "docker" in content or "containerd" in content
-    except (FileNotFoundError, PermissionError):
-        info['cgroup_contains_docker'] = None
-    
-    # 综合判断
-    info['is_docker'] = (
-        info['docker_run_env'].lower() == "true" or
-        info['dockerenv_file_exists'] or
-        info['cgroup_contains_docker'] is True
-    )
-    
     return info
 
 
@@ -2,17 +2,60 @@
 log_manager.py
 
 提供一个简单的日志管理器：
-- 记录日志到内存（队列与历史列表）与文件
+- 记录日志到内存（队列与历史列表）与文件（常驻文件句柄 + 定时刷盘）
 - 支持限制历史长度并定期清理过大的日志文件
 """
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import itertools
+import mmap
 import os
+import re
+import shutil
+import sys
+import tempfile
 import time
+import threading
 from datetime import datetime, timedelta
-from queue import Queue
-from typing import List, Optional
+from collections import deque
+from queue import Empty, Queue, SimpleQueue
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# 日志行开头的完整时间戳：[YYYY-MM-DD HH:MM:SS]（按字节匹配，清理时无需解码整行）
+_TS_RE = re.compile(rb'^\[(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})\]')
+
+# 清理重写日志时单次写出的缓冲大小（字节）
+_REWRITE_CHUNK_SIZE = 1024 * 1024
+
+# 写文件线程单次最多合并的日志行数，以及日志文件写缓冲大小（字节）
+_WRITE_BATCH_MAX_LINES = 512
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def tail_file(path: str, n: int) -> List[str]:
+    """读取文件最后 n 行（不含换行符）：在只读内存映射上从末尾向前查找换行符，只解码最后 n 行。
+
+    直接在页缓存上查找，不经过读缓冲逐块复制；文件不存在时抛出 FileNotFoundError。
+    """
+    if n <= 0:
+        return []
+    with open(path, 'rb') as f:
+        # 空文件无法映射
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = len(mm)
+            # 多找一个换行符：末尾换行本身不构成一行，且保证最前面的一行是完整的
+            for _ in range(n + 1):
+                pos = mm.rfind(b'\n', 0, pos)
+                if pos < 0:
+                    break
+            data = mm[pos + 1:]
+    return data.decode('utf-8', 'replace').splitlines()[-n:]
 
 
 class LogManager:
@@ -21,16 +64,22 @@ class LogManager:
     参数：
     - log_file_path: 日志文件路径
     - max_log_history: 内存保存的最大行数
+    - console: 是否同时输出到控制台（由后台线程批量写 stdout）
     """
 
-    def __init__(self, log_file_path: str, max_log_history: int = 2000) -> None:
+    def __init__(self, log_file_path: str, max_log_history: int = 2000, console: bool = True) -> None:
         self.log_file_path = log_file_path
         self.max_log_history = max_log_history
-        self.log_queue: Queue[str] = Queue()
-        self.log_history: List[str] = []
-        self.last_cleanup_time = 0  # 上次清理时间（时间戳）
+        self.console = console
+        # 环形缓冲：超出 max_log_history 时自动淘汰最旧的日志，追加为 O(1)
+        self.log_history: Deque[str] = deque(maxlen=max_log_history)
+        # 历史版本号：每追加一条日志加一，读取方可据此判断历史是否变化
+        self.history_version = 0
+        self._history_text_cache: Tuple[int, int, str] = (-1, 0, "")  # (历史版本号, 行数, 拼接后的文本)
         self.cleanup_interval = 3600  # 清理间隔：1小时（秒）
         self.log_retention_days = 3  # 日志保留天数
+        self.flush_interval = 3  # 文件缓冲刷盘间隔（秒）
+        self._ts_cache = (0, "")  # (秒级时间戳, 格式化字符串)
 
         # 确保目录存在
         os.makedirs(os.path.dirname(self.log_file_path), exist_ok=True)
@@ -38,170 +87,346 @@ class LogManager:
             with open(self.log_file_path, 'w', encoding='utf-8'):
                 pass
 
+        # 启动时用日志文件末尾的内容预填历史，之后历史只在内存中维护，读取时不再访问文件
+        try:
+            self.log_history.extend(tail_file(self.log_file_path, max_log_history))
+        except OSError:
+            pass
+
+        # 常驻追加句柄：日志由后台写文件线程批量写入 64 KiB 缓冲，并定时刷盘
+        self._lock = threading.Lock()  # 保护内存历史
+        # 等待历史变化的协程：(事件循环, asyncio.Event)，由 log_message 跨线程唤醒；受 _lock 保护
+        self._history_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._file_lock = threading.Lock()  # 保护文件句柄
+        self._closed = False
+        self._fh = open(self.log_file_path, 'a', buffering=_WRITE_BUFFER_SIZE, encoding='utf-8')
+        self._file_q: Queue[str] = Queue()
+        self._file_thread = threading.Thread(target=self._file_loop, daemon=True)
+        self._file_thread.start()
+        # 控制台输出队列：记录日志的线程只入队，不在 stdout 锁上排队
+        self._console_q: SimpleQueue[str] = SimpleQueue()
+        if self.console:
+            self._console_thread = threading.Thread(target=self._console_loop, daemon=True)
+            self._console_thread.start()
+        # 定时清理旧日志：启动时立即清理一次，之后每 cleanup_interval 秒一次
+        self._cleanup_timer: Optional[threading.Timer] = None
+        self._schedule_cleanup(0)
+        atexit.register(self.close)
+
     def log_message(self, message: str) -> None:
-        """记录日志消息（写入队列、历史与文件，并控制台输出）。"""
-        # 使用完整的日期时间格式，便于日志清理
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}"
+        """记录日志消息（写入队列、历史与文件，并控制台输出）。
 
-        # 添加到队列（用于实时显示）
-        self.log_queue.put(log_entry)
+        可被多个线程同时调用：只有内存历史的追加在锁内完成，
+        文件与控制台输出都交给后台线程，调用方不等待任何 I/O；
+        旧日志清理由独立的定时器负责，不占用记录日志的路径。
+        """
+        # 使用完整的日期时间格式，便于日志清理
+        log_entry = f"[{self._format_now()}] {message}"
 
-        # 添加到历史记录
-        self.log_history.append(log_entry)
+        with self._lock:
+            # 添加到历史记录（deque 自动限制长度）
+            self.log_history.append(log_entry)
+            self.history_version += 1
+            waiters = list(self._history_waiters) if self._history_waiters else ()
 
-        # 限制历史记录长度
-        if len(self.log_history) > self.max_log_history:
-            self.log_history = self.log_history[-self.max_log_history:]
+        # 唤醒等待新日志的协程（在各自的事件循环中设置事件，不阻塞记录日志的线程）
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 事件循环已关闭，等待方随之结束
+                pass
 
-        # 写入日志文件
-        self._write_log_to_file(log_entry)
+        # 写入日志文件（交给后台线程）；关闭后写文件线程已停止，不再入队，避免 flush 等待永远不会完成的任务
+        if not self._closed:
+            self._file_q.put(log_entry)
 
-        # 定期清理旧日志（每小时检查一次）
-        current_time = time.time()
-        if current_time - self.last_cleanup_time > self.cleanup_interval:
-            self._cleanup_old_logs_by_time()
-            self.last_cleanup_time = current_time
+        # 控制台输出（交给后台线程写 stdout）
+        if self.console:
+            self._console_q.put(log_entry)
 
-        # 控制台输出
-        print(log_entry)
+    def _format_now(self) -> str:
+        """返回当前时间的 "%Y-%m-%d %H:%M:%S" 字符串，同一秒内复用缓存结果。"""
+        sec = int(time.time())
+        cached_sec, cached_str = self._ts_cache
+        if sec != cached_sec:
+            cached_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+            # 秒数与字符串作为一个元组整体替换，多线程读取时不会错配
+            self._ts_cache = (sec, cached_str)
+        return cached_str
 
-    def _write_log_to_file(self, log_entry: str) -> None:
-        """将日志写入文件。"""
+    def _write_log_to_file(self, log_text: str) -> None:
+        """将一批日志文本写入文件缓冲（由写文件线程定时或 flush() 落盘）。"""
         try:
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(log_entry + '\n')
+            with self._file_lock:
+                self._fh.write(log_text)
         except Exception as e:
             print(f"写入日志文件失败: {e}")
 
+    def _flush_buffer(self) -> None:
+        """将文件缓冲中的内容写入磁盘。"""
+        try:
+            with self._file_lock:
+                if not self._fh.closed:
+                    self._fh.flush()
+        except Exception as e:
+            print(f"刷新日志文件失败: {e}")
+
+    def flush(self) -> None:
+        """等待已记录的日志全部写入文件，并立即刷盘（关闭后直接返回）。"""
+        if self._closed:
+            return
+        self._file_q.join()
+        self._flush_buffer()
+
+    def close(self) -> None:
+        """刷盘并关闭日志文件句柄（进程退出时自动调用）。"""
+        if self._closed:
+            return
+        if self._cleanup_timer is not None:
+            self._cleanup_timer.cancel()
+        self.flush()
+        with self._file_lock:
+            self._closed = True
+            self._fh.close()
+        # 输出尚未打印到控制台的日志
+        self._write_console_batch()
+
+    def _write_console_batch(self, first: Optional[str] = None) -> None:
+        """取出控制台队列中已有的日志，一次性写入 stdout 并刷新。"""
+        lines = [] if first is None else [first]
+        try:
+            while True:
+                lines.append(self._console_q.get_nowait())
+        except Empty:
+            pass
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+    def _console_loop(self) -> None:
+        """后台控制台线程：阻塞等待日志，随后把积压的日志批量输出。"""
+        while True:
+            try:
+                self._write_console_batch(self._console_q.get())
+            except Exception:
+                # stdout 不可用时丢弃控制台输出，不影响日志记录
+                pass
+
+    def _file_loop(self) -> None:
+        """后台写文件线程：将队列中积压的日志合并为一次写入，每 flush_interval 秒刷盘一次。"""
+        last_flush = time.monotonic()
+        while not self._closed:
+            try:
+                batch = [self._file_q.get(timeout=self.flush_interval)]
+            except Empty:
+                pass
+            else:
+                try:
+                    while len(batch) < _WRITE_BATCH_MAX_LINES:
+                        batch.append(self._file_q.get_nowait())
+                except Empty:
+                    pass
+                self._write_log_to_file('\n'.join(batch) + '\n')
+                for _ in batch:
+                    self._file_q.task_done()
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_buffer()
+                last_flush = time.monotonic()
+
+    def _schedule_cleanup(self, delay: float) -> None:
+        """在 delay 秒后执行一次定时清理。"""
+        timer = threading.Timer(delay, self._periodic_cleanup)
+        timer.daemon = True
+        self._cleanup_timer = timer
+        timer.start()
+
+    def _periodic_cleanup(self) -> None:
+        """定时器回调：清理旧日志并安排下一次清理。"""
+        if self._closed:
+            return
+        self._cleanup_old_logs_by_time()
+        self._schedule_cleanup(self.cleanup_interval)
+
     def _cleanup_old_logs_by_time(self) -> None:
         """基于时间清理旧日志，只保留指定天数内的日志。"""
         try:
             if not os.path.exists(self.log_file_path):
                 return
-                
-            # 计算保留的截止时间
-            cutoff_time = datetime.now() - timedelta(days=self.log_retention_days)
-            cutoff_timestamp = cutoff_time.timestamp()
-            
-            # 读取所有日志行
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            if not lines:
-                return
-                
-            # 过滤出需要保留的日志行
-            kept_lines = []
-            removed_count = 0
-            
-            for line in lines:
-                # 尝试从日志行中提取时间戳
-                if self._should_keep_log_line(line, cutoff_timestamp):
-                    kept_lines.append(line)
-                else:
-                    removed_count += 1
-            
-            # 如果删除了日志，重写文件
+
+            kept_count, removed_count = self._rewrite_recent_logs()
             if removed_count > 0:
-                with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(kept_lines)
-                print(f"🧹 日志清理完成：删除了 {removed_count} 行旧日志，保留了 {len(kept_lines)} 行")
+                print(f"🧹 日志清理完成：删除了 {removed_count} 行旧日志，保留了 {kept_count} 行")
                 
         except Exception as e:
             print(f"清理日志文件失败: {e}")
 
-    def _should_keep_log_line(self, line: str, cutoff_timestamp: float) -> bool:
+    def _rewrite_recent_logs(self) -> Tuple[int, int]:
+        """流式过滤日志文件，只保留 log_retention_days 天内的行。
+
+        逐行读取原文件，内存占用与文件大小无关。返回 (保留行数, 删除行数)。
+        """
+        # 计算保留的截止时间
+        cutoff_time = datetime.now() - timedelta(days=self.log_retention_days)
+        cutoff_timestamp = cutoff_time.timestamp()
+
+        return self._rewrite_log_file(
+            lambda lines: (line for line in lines if self._should_keep_log_line(line, cutoff_timestamp))
+        )
+
+    def _rewrite_log_file(self, select_lines: Callable[[Iterable[bytes]], Iterable[bytes]]) -> Tuple[int, int]:
+        """按 select_lines 筛选日志行并安全地重写日志文件。
+
+        select_lines 接收原文件的行（bytes），返回需要保留的行。
+        保留的行先写入同目录的临时文件并 fsync，有行被删除时再用 os.replace
+        原子替换原文件：磁盘上始终是完整的旧文件或新文件，不存在截断后的空窗期。
+        返回 (保留行数, 删除行数)。
+        """
+        total_count = 0
+        kept_count = 0
+
+        def _counted(lines: Iterable[bytes]) -> Iterator[bytes]:
+            nonlocal total_count
+            for line in lines:
+                total_count += 1
+                yield line
+
+        # 关闭后不再重写：写文件线程已停止，也不能重新打开追加句柄
+        if self._closed:
+            return 0, 0
+        # 先把已记录的日志落盘，避免清理时遗漏
+        self._file_q.join()
+        with self._file_lock:
+            # close() 可能在上面的检查之后抢先拿到锁并关闭了句柄
+            if self._closed:
+                return 0, 0
+            # 持锁期间写文件线程暂停写入，新日志在队列中等待，不会在替换时丢失
+            self._fh.flush()
+            dst = tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(self.log_file_path), delete=False)
+            try:
+                # 以二进制读写：时间戳前缀是 ASCII，无需对每行做 UTF-8 解码/编码
+                with open(self.log_file_path, 'rb') as src, dst:
+                    # 保留的行先拼接到 bytearray，攒满 _REWRITE_CHUNK_SIZE 后一次写出，
+                    # 避免逐行 write 调用，同时内存占用有上限
+                    buf = bytearray()
+                    for line in select_lines(_counted(src)):
+                        buf += line
+                        kept_count += 1
+                        if len(buf) >= _REWRITE_CHUNK_SIZE:
+                            dst.write(buf)
+                            buf.clear()
+                    if buf:
+                        dst.write(buf)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+
+                if kept_count < total_count:
+                    # 沿用原文件权限，替换后重新打开追加句柄指向新文件
+                    shutil.copymode(self.log_file_path, dst.name)
+                    os.replace(dst.name, self.log_file_path)
+                    self._fh.close()
+                    self._fh = open(self.log_file_path, 'a', buffering=_WRITE_BUFFER_SIZE, encoding='utf-8')
+                else:
+                    os.remove(dst.name)
+            except Exception:
+                if os.path.exists(dst.name):
+                    os.remove(dst.name)
+                raise
+
+        return kept_count, total_count - kept_count
+
+    def _should_keep_log_line(self, line: bytes, cutoff_timestamp: float) -> bool:
         """判断日志行是否应该保留（基于时间戳）。"""
-        try:
-            # 日志格式：[时间戳] 消息内容
-            # 例如：[2025-09-05 05:42:37] name=检验大叔官网 url=https://www.jianyandashu.com status=up
-            if line.startswith('[') and ']' in line:
-                # 提取时间戳部分
-                timestamp_str = line[1:line.index(']')]
-                
-                # 尝试解析时间戳
-                if ' ' in timestamp_str and ':' in timestamp_str:
-                    # 格式：2025-09-05 05:42:37
-                    try:
-                        log_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                        return log_time.timestamp() >= cutoff_timestamp
-                    except ValueError:
-                        pass
-                elif ':' in timestamp_str:
-                    # 格式：05:42:37（只有时间，没有日期）
-                    # 对于这种格式，我们假设是今天的日志，直接保留
-                    return True
-                    
-            # 如果无法解析时间戳，保留该行（避免误删重要日志）
+        # 日志格式：[时间戳] 消息内容
+        # 例如：[2025-09-05 05:42:37] name=检验大叔官网 url=https://www.jianyandashu.com status=up
+        m = _TS_RE.match(line)
+        if m is None:
+            # 只有时间没有日期（如 [05:42:37]）或无法解析时间戳的行一律保留，避免误删重要日志
             return True
-            
-        except Exception:
+        try:
+            # 直接用匹配到的整数构造本地时间，避免 strptime 与 datetime 对象的开销
+            log_timestamp = time.mktime((
+                int(m[1]), int(m[2]), int(m[3]),
+                int(m[4]), int(m[5]), int(m[6]),
+                0, 0, -1,
+            ))
+        except (OverflowError, ValueError):
             # 解析失败时保留该行
             return True
+        return log_timestamp >= cutoff_timestamp
 
     def _cleanup_old_logs(self) -> None:
         """清理过旧的日志文件内容（超过 5000 行则截断为后 2500 行）。"""
+
+        def _keep_tail(lines: Iterable[bytes]) -> Iterable[bytes]:
+            # 只在内存中保留最后 5001 行，足以判断是否超过 5000 行
+            tail = deque(lines, maxlen=5001)
+            if len(tail) > 5000:
+                return itertools.islice(tail, len(tail) - 2500, None)
+            return tail
+
         try:
             if os.path.exists(self.log_file_path):
-                with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                if len(lines) > 5000:
-                    lines = lines[-2500:]
-                    with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                        f.writelines(lines)
+                self._rewrite_log_file(_keep_tail)
         except Exception as e:
             print(f"清理日志文件失败: {e}")
 
-    def drain_queue_as_text(self) -> str:
-        """取出队列里所有新日志，拼接为文本。若无则返回空串。"""
-        chunks: List[str] = []
-        while not self.log_queue.empty():
-            chunks.append(self.log_queue.get())
-        return "\n".join(chunks)
+    async def wait_for_history_change(self, since_version: Optional[int], timeout: Optional[float] = None) -> int:
+        """等待历史版本号不同于 since_version（最多 timeout 秒），返回当前版本号。
+
+        在调用方的事件循环中等待，不占用线程；每个读取方各自持有版本号，多个页面同时等待互不影响。
+        超时返回的版本号可能仍与 since_version 相同。
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self.history_version != since_version:
+                return self.history_version
+            self._history_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._history_waiters.discard(waiter)
+        return self.history_version
 
     def get_history_text(self, n: Optional[int] = None) -> str:
-        """获取历史日志文本，默认返回全部（最多 max_log_history）。"""
-        if not self.log_history:
-            return "(暂无日志)\n"
+        """获取历史日志文本，默认返回全部（最多 max_log_history）。
+
+        历史在启动时已由日志文件末尾预填，这里只读取内存，不访问文件。
+        拼接在锁内完成，不会与其他线程追加日志冲突。
+        """
         if n is None:
             n = self.max_log_history
-        return "\n".join(self.log_history[-n:]) + "\n"
+        with self._lock:
+            # 历史未变化时直接复用上次拼接的文本，多个页面同时刷新只拼接一次
+            version, cached_n, text = self._history_text_cache
+            if version == self.history_version and cached_n == n:
+                return text
+            if not self.log_history:
+                return "(暂无日志)\n"
+            # 从尾部向前只取 n 条再反转：正向 islice 需要先跳过前面的 len - n 条
+            lines = list(itertools.islice(reversed(self.log_history), n))
+            lines.reverse()
+            text = "\n".join(lines) + "\n"
+            self._history_text_cache = (self.history_version, n, text)
+            return text
 
     def cleanup_logs_now(self) -> str:
         """立即执行日志清理，返回清理结果信息。"""
         try:
             if not os.path.exists(self.log_file_path):
                 return "日志文件不存在"
-                
-            # 计算保留的截止时间
-            cutoff_time = datetime.now() - timedelta(days=self.log_retention_days)
-            cutoff_timestamp = cutoff_time.timestamp()
-            
-            # 读取所有日志行
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            if not lines:
+
+            kept_count, removed_count = self._rewrite_recent_logs()
+            if kept_count == 0 and removed_count == 0:
                 return "日志文件为空"
-                
-            # 过滤出需要保留的日志行
-            kept_lines = []
-            removed_count = 0
-            
-            for line in lines:
-                if self._should_keep_log_line(line, cutoff_timestamp):
-                    kept_lines.append(line)
-                else:
-                    removed_count += 1
-            
-            # 如果删除了日志，重写文件
+
             if removed_count > 0:
-                with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(kept_lines)
-                return f"🧹 日志清理完成：删除了 {removed_count} 行旧日志，保留了 {len(kept_lines)} 行"
+                return f"🧹 日志清理完成：删除了 {removed_count} 行旧日志，保留了 {kept_count} 行"
             else:
-                return f"📝 日志文件正常，共 {len(kept_lines)} 行，无需清理"
+                return f"📝 日志文件正常，共 {kept_count} 行，无需清理"
                 
         except Exception as e:
             return f"❌ 清理日志失败: {str(e)}"
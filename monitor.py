@@ -8,17 +8,27 @@ monitor.py
 - SSL 证书验证
 - 内容关键字检测
 - 详细的错误处理和日志记录
+- 基于 asyncio 的并发轮询（一轮耗时约等于最慢站点）
 """
 
+import codecs
 import os
+import re
 import time
+import asyncio
 import threading
-import random
+import weakref
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import connection as urllib3_connection
+from urllib3.util.connection import allowed_gai_family
 import ssl
 import socket
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from urllib.parse import urlparse
-from typing import Dict, List, Any
+from typing import Dict, List, Any, NamedTuple, Optional, Pattern, Tuple
 from log_manager import get_log_manager
 from telegram_notifier import send_site_down_alert, send_site_recovery_alert
 from telegram_config import get_failure_threshold, is_telegram_configured
@@ -32,6 +42,247 @@ LOG_FILE_PATH = os.path.join(LOG_DIR, "uptime.log")
 # 内存中的最近状态快照，供 UI 展示。
 # 结构： {url: {"status": "up"|"down", "latency_ms": int, "timestamp": float}}
 latest_status_snapshot: Dict[str, Dict[str, Any]] = {}
+# 快照锁：每轮轮询的所有更新在锁内一次性合并，读取方在锁内复制，避免读到半轮结果
+_snapshot_lock = threading.Lock()
+# 快照版本号：每轮轮询合并结果后加一，读取方可据此判断快照是否变化
+_snapshot_version = 0
+
+
+def get_status_snapshot() -> Dict[str, Dict[str, Any]]:
+    """返回状态快照的一致副本（浅拷贝），供 UI 等读取方使用。"""
+    with _snapshot_lock:
+        return dict(latest_status_snapshot)
+
+
+# 表格展示用的状态列：{url: (http_status, html_keyword, ssl_status, status, consecutive_failures, latency_ms, 检测时间)}
+# 与快照在同一把锁内同步更新，UI 刷新时直接按 URL 取整行，无需逐字段读取和格式化
+latest_status_cells: Dict[str, Tuple[Any, ...]] = {}
+_entry_cells = itemgetter("http_status", "html_keyword", "ssl_status", "status", "consecutive_failures", "latency_ms")
+
+
+def get_status_cells() -> Dict[str, Tuple[Any, ...]]:
+    """返回表格状态列的一致副本（浅拷贝），与 get_status_snapshot 来自同一轮轮询。"""
+    with _snapshot_lock:
+        return dict(latest_status_cells)
+
+
+def get_status_snapshot_version() -> int:
+    """返回当前快照版本号（版本号不变则快照内容不变）。"""
+    return _snapshot_version
+
+
+# 站点检查线程池：进程内只创建一次，各轮轮询共享，阻塞的 HTTP 检查在这里并发执行
+CHECK_MAX_WORKERS = 32
+# 单个站点检查（HTTP 请求 + SSL 检查）允许的最长总耗时（秒）
+CHECK_TIMEOUT_SECONDS = 30
+_check_executor = ThreadPoolExecutor(max_workers=CHECK_MAX_WORKERS, thread_name_prefix="site-check")
+# 同一主机同时进行的检查数上限，避免同主机的多个站点同时占满连接
+CHECK_MAX_PER_HOST = 2
+
+# 各事件循环的检查并发名额：(线程池名额, {主机: 主机名额})。
+# 名额在检查线程真正结束时才归还，超时后仍在运行的检查继续占用，
+# 后台轮询始终使用同一个事件循环，因此跨轮也不会超出线程池与单主机的上限
+_loop_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[asyncio.Semaphore, Dict[str, asyncio.Semaphore]]]" = weakref.WeakKeyDictionary()
+
+
+def _check_limits() -> Tuple[asyncio.Semaphore, Dict[str, asyncio.Semaphore]]:
+    """返回当前事件循环的线程池名额与各主机名额（首次调用时创建）。"""
+    loop = asyncio.get_running_loop()
+    limits = _loop_limits.get(loop)
+    if limits is None:
+        limits = _loop_limits[loop] = (asyncio.Semaphore(CHECK_MAX_WORKERS), {})
+    return limits
+
+
+# DNS 解析缓存：同一主机在 TTL 内只解析一次，避免每轮每站点都发起 DNS 查询。
+# 只作用于站点检查（检查会话发出的请求与 SSL 证书检查），不替换 socket.getaddrinfo，
+# Gradio、Telegram 等其余网络访问仍按系统解析。
+DNS_CACHE_TTL_SECONDS = 300
+_DNS_CACHE_MAX_ENTRIES = 1024
+_dns_cache: Dict[tuple, tuple] = {}  # (主机, 端口, 地址族) -> (过期时间, getaddrinfo 结果)
+
+
+def _cached_getaddrinfo(host: str, port: int, family: int) -> list:
+    """带 TTL 的 TCP 地址解析；解析失败不缓存，照常抛出异常。"""
+    key = (host, port, family)
+    now = time.monotonic()
+    cached = _dns_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    result = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+    if len(_dns_cache) >= _DNS_CACHE_MAX_ENTRIES:
+        _dns_cache.clear()
+    _dns_cache[key] = (now + DNS_CACHE_TTL_SECONDS, result)
+    return result
+
+
+def _create_connection(address: Tuple[str, int], *args: Any, **kwargs: Any) -> socket.socket:
+    """
+    使用 DNS 缓存中的地址建立 TCP 连接：依次尝试每个地址，连接本身交给 urllib3 的 create_connection，
+    超时、源地址与套接字选项原样传递；全部连接失败时丢弃该主机的缓存，下次重新解析以便切换到新地址。
+    """
+    host, port = address
+    if host.startswith("["):
+        host = host.strip("[]")
+    family = allowed_gai_family()
+    error: Optional[OSError] = None
+    for _af, _socktype, _proto, _canonname, sa in _cached_getaddrinfo(host, port, family):
+        try:
+            return _urllib3_create_connection((sa[0], port), *args, **kwargs)
+        except OSError as e:
+            error = e
+    _dns_cache.pop((host, port, family), None)
+    if error is not None:
+        raise error
+    raise OSError("getaddrinfo returns an empty list")
+
+
+# urllib3 的连接类通过 urllib3.util.connection.create_connection 建立连接，在此包一层：
+# 只有检查会话的请求（_CachedDNSAdapter.send 期间，按线程标记）走 DNS 缓存，其余请求照常解析
+_urllib3_create_connection = urllib3_connection.create_connection
+_dns_scope = threading.local()
+
+
+def _scoped_create_connection(address: Tuple[str, int], *args: Any, **kwargs: Any) -> socket.socket:
+    if getattr(_dns_scope, "active", False):
+        return _create_connection(address, *args, **kwargs)
+    return _urllib3_create_connection(address, *args, **kwargs)
+
+
+urllib3_connection.create_connection = _scoped_create_connection
+
+
+class _CachedDNSAdapter(HTTPAdapter):
+    """发送请求期间为当前线程开启 DNS 缓存，仅挂载在站点检查会话上"""
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        _dns_scope.active = True
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            _dns_scope.active = False
+
+
+# 站点检查共用的 HTTP 会话：连接池大小与检查线程数一致，
+# keep-alive 让同一站点在多轮轮询间复用 TCP/TLS 连接，不必每次重新握手
+_SESSION = requests.Session()
+for _prefix in ("http://", "https://"):
+    _SESSION.mount(_prefix, _CachedDNSAdapter(pool_connections=64, pool_maxsize=CHECK_MAX_WORKERS, max_retries=0))
+
+
+# 检查请求使用的请求头（模拟真实浏览器），所有检查共用同一份
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# 关键词检测：流式读取响应体，命中即停止；最多扫描的字节数与每次读取的块大小
+KEYWORD_SCAN_MAX_BYTES = 1024 * 1024
+_KEYWORD_CHUNK_SIZE = 8192
+
+
+def _trie_regex_source(words: Tuple[bytes, ...]) -> bytes:
+    """
+    将关键词构建为前缀树形式的正则源码，例如 (b"abc", b"abd", b"x") -> b"(?:ab[cd]|x)"。
+    正则在每个位置按下一个字节分支，而不是逐个尝试每个关键词；
+    只需判断"是否命中任一关键词"，因此某个关键词结束后不必再匹配更长的分支。
+    """
+    trie: Dict[bytes, dict] = {}
+    for word in words:
+        node = trie
+        for i in range(len(word)):
+            if b"" in node:
+                break  # 更短的关键词已是前缀，命中它即可
+            node = node.setdefault(word[i:i + 1], {})
+        else:
+            node.clear()
+            node[b""] = {}
+
+    def build(node: Dict[bytes, dict]) -> bytes:
+        if b"" in node:
+            return b""
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        if all(len(branch) == 1 for branch in branches):
+            return b"[" + b"".join(branches) + b"]"
+        return b"(?:" + b"|".join(branches) + b")"
+
+    return build(trie)
+
+
+@lru_cache(maxsize=256)
+def _keyword_pattern(keywords: Tuple[str, ...], encoding: str) -> Tuple[Pattern[bytes], int]:
+    """
+    将关键词编译为字节正则，直接匹配原始响应字节，省去整页解码与转小写。
+    关键词按页面声明的编码和 UTF-8 各编码一份（未声明编码的页面多为 UTF-8），
+    ASCII 字母忽略大小写。按 (关键词元组, 编码) 缓存，返回 (正则, 最长关键词字节数)。
+    """
+    encoded = set()
+    for keyword in keywords:
+        for codec in (encoding, "utf-8"):
+            try:
+                encoded.add(keyword.encode(codec).lower())
+            except (LookupError, UnicodeError):
+                continue
+    if not encoded:
+        # 没有可编码的关键词：空的前缀树会生成匹配任意内容的正则，改用永不匹配的正则
+        return re.compile(b"(?!)"), 0
+    pattern = re.compile(_trie_regex_source(tuple(encoded)), re.IGNORECASE)
+    return pattern, max(len(word) for word in encoded)
+
+
+@lru_cache(maxsize=256)
+def _casefolded_keywords(keywords: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+    """
+    关键词含非 ASCII 的大小写字母（如 Ü、Я）时，字节正则的 IGNORECASE 无法忽略其大小写，
+    返回大小写折叠后的关键词，改为解码后按文本匹配；否则返回 None（中文等无大小写之分，仍按字节匹配）。
+    """
+    if not any(not ch.isascii() and ch.lower() != ch.upper() for keyword in keywords for ch in keyword):
+        return None
+    return tuple({keyword.casefold() for keyword in keywords})
+
+
+def _scan_for_keywords(response: requests.Response, keywords: Tuple[str, ...]) -> bool:
+    """
+    流式扫描响应内容，任一关键词命中即返回 True。
+    相邻块之间保留 (最长关键词长度 - 1) 的重叠，避免关键词被块边界截断而漏检。
+    """
+    keywords = tuple(keywords)
+    encoding = response.encoding or "utf-8"
+    folded = _casefolded_keywords(keywords)
+    if folded is None:
+        pattern, max_len = _keyword_pattern(keywords, encoding)
+        decoder = None
+        tail = b""
+    else:
+        # 增量解码：多字节字符被块边界截断时等待下一块补全
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        max_len = max(len(keyword) for keyword in folded)
+        tail = ""
+    overlap = max_len - 1
+    scanned = 0
+    for chunk in response.iter_content(chunk_size=_KEYWORD_CHUNK_SIZE):
+        scanned += len(chunk)
+        if decoder is None:
+            data = tail + chunk
+            found = pattern.search(data) is not None
+        else:
+            data = tail + decoder.decode(chunk).casefold()
+            found = any(keyword in data for keyword in folded)
+        if found:
+            return True
+        if scanned >= KEYWORD_SCAN_MAX_BYTES:
+            break
+        tail = data[-overlap:] if overlap > 0 else data[:0]
+    return False
 
 
 def ensure_log_file() -> None:
@@ -42,6 +293,12 @@ def ensure_log_file() -> None:
             f.write("")
 
 
+@lru_cache(maxsize=4096)
+def format_ts(sec: int) -> str:
+    """按秒格式化时间戳；同一轮轮询的结果基本落在相近的几秒内，缓存可免去重复格式化"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+
+
 def write_log_line(line: str) -> None:
     """写一行到日志（通过 LogManager：文件 + 内存）。"""
     ensure_log_file()
@@ -49,26 +306,62 @@ def write_log_line(line: str) -> None:
     manager.log_message(line)
 
 
+# SSL 上下文：加载系统 CA 证书开销较大，模块加载时创建一次，所有证书检查共用
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = True
+_SSL_CTX.verify_mode = ssl.CERT_REQUIRED
+
+
+# 证书验证结果缓存：(主机, 端口) -> (证书过期时间, 验证时间)
+# 验证通过后一天内、且证书距过期超过一天时，不再重复握手
+CERT_CACHE_REVALIDATE_SECONDS = 24 * 3600
+CERT_EXPIRY_MARGIN_SECONDS = 24 * 3600
+_cert_cache: Dict[Tuple[str, int], Tuple[float, float]] = {}
+
+
+@lru_cache(maxsize=512)
+def _parse_url(url: str):
+    """解析 URL（站点列表基本不变，按 URL 缓存解析结果）"""
+    return urlparse(url)
+
+
+class CheckResult(NamedTuple):
+    """单次站点检查的结果（字段固定，按属性读取）。"""
+    http_status: int
+    html_keyword: str
+    ssl_status: str
+    status: str  # "up" | "down"
+    latency_ms: int
+    timestamp: float
+    error: Optional[str]
+    ssl_error: Optional[str]
+
+
 def check_ssl_certificate(url: str) -> Dict[str, Any]:
     """
     检查 SSL 证书状态（仅对 HTTPS 网站）。
     返回: {"ssl_status": "up"/"down", "ssl_error": str}
     """
     try:
-        parsed_url = urlparse(url)
+        parsed_url = _parse_url(url)
         if parsed_url.scheme != 'https':
             return {"ssl_status": "not_applicable", "ssl_error": None}
         
-        # 创建 SSL 上下文
-        context = ssl.create_default_context()
-        context.check_hostname = True
-        context.verify_mode = ssl.CERT_REQUIRED
+        # 近期已验证过且距离过期还早，直接沿用结果，跳过 TLS 握手
+        cache_key = (parsed_url.hostname, parsed_url.port or 443)
+        cached = _cert_cache.get(cache_key)
+        now = time.time()
+        if cached is not None and now - cached[1] < CERT_CACHE_REVALIDATE_SECONDS \
+                and now < cached[0] - CERT_EXPIRY_MARGIN_SECONDS:
+            return {"ssl_status": "up", "ssl_error": None}
         
         # 连接到服务器并检查证书
-        with socket.create_connection((parsed_url.hostname, parsed_url.port or 443), timeout=10) as sock:
-            with context.wrap_socket(sock, server_hostname=parsed_url.hostname) as ssock:
-                # 获取证书信息
+        with _create_connection(cache_key, timeout=10) as sock:
+            with _SSL_CTX.wrap_socket(sock, server_hostname=parsed_url.hostname) as ssock:
+                # 获取证书信息，记录过期时间供后续轮询复用
                 cert = ssock.getpeercert()
+                if cert and cert.get("notAfter"):
+                    _cert_cache[cache_key] = (ssl.cert_time_to_seconds(cert["notAfter"]), now)
                 return {"ssl_status": "up", "ssl_error": None}
                 
     except ssl.SSLError as e:
@@ -79,50 +372,61 @@ def check_ssl_certificate(url: str) -> Dict[str, Any]:
         return {"ssl_status": "down", "ssl_error": f"SSL检查异常: {str(e)}"}
 
 
-def real_check(url: str, keywords: List[str] = None) -> Dict[str, Any]:
+def real_check(url: str, keywords: Tuple[str, ...] = ()) -> CheckResult:
     """
     真实的网站检查，包括 HTTP 状态、响应时间、SSL 证书等。
     如果提供了关键词列表，将根据关键词判断网站状态。
-    返回完整的检查结果字典。
+    返回完整的检查结果 CheckResult。
     """
     start_time = time.time()
     error_message = None
     http_status = 0
     html_keyword = "-"
+    is_https = _parse_url(url).scheme == 'https'
+    # HTTPS 的证书状态直接取自本次请求（verify=True 已完成证书校验）：
+    # 请求成功即证书有效，抛出 SSLError 即证书有问题；其余失败再单独检查证书
+    ssl_result = None
     
     try:
-        # 设置请求头，模拟真实浏览器
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
+        request_options = {
+            "headers": _HEADERS,
+            "timeout": 10,  # 10秒超时
+            "allow_redirects": True,  # 允许重定向
+            "verify": True,  # 验证 SSL 证书
         }
-        
-        # 发送 HTTP 请求，设置超时时间
-        response = requests.get(
-            url, 
-            headers=headers, 
-            timeout=10,  # 10秒超时
-            allow_redirects=True,  # 允许重定向
-            verify=True  # 验证 SSL 证书
-        )
-        
-        # 记录响应时间（毫秒）
-        latency_ms = int((time.time() - start_time) * 1000)
-        
-        # 获取 HTTP 状态码
-        http_status = response.status_code
-        
-        # 检查响应内容中的关键字
-        content = response.text.lower()
+
+        # 发送 HTTP 请求（经连接池复用连接，读取完毕后连接归还连接池）
+        if keywords:
+            # 需要检查页面内容：流式读取响应体，命中关键词即停止读取
+            with _SESSION.get(url, stream=True, **request_options) as response:
+                # 记录响应时间（毫秒）
+                latency_ms = int((time.time() - start_time) * 1000)
+                
+                # 获取 HTTP 状态码
+                http_status = response.status_code
+                
+                # 检查响应内容中的关键字
+                keyword_found = _scan_for_keywords(response, keywords)
+        else:
+            # 只需要状态码：发送 HEAD，不下载响应体；HEAD 返回错误状态时再用 GET 确认，
+            # 不少服务器或 WAF 对 HEAD 返回 403/404 等任意错误码，而 GET 正常
+            response = _SESSION.head(url, **request_options)
+            if response.status_code >= 400:
+                response.close()
+                response = _SESSION.get(url, **request_options)
+            response.close()
+
+            # 记录响应时间（毫秒）
+            latency_ms = int((time.time() - start_time) * 1000)
+            
+            # 获取 HTTP 状态码
+            http_status = response.status_code
+
+        if is_https:
+            ssl_result = {"ssl_status": "up", "ssl_error": None}
         
         # 如果提供了关键词列表，使用关键词判断状态
         if keywords:
-            # 检查是否包含任何指定的关键词
-            keyword_found = any(keyword.lower() in content for keyword in keywords)
             if keyword_found:
                 html_keyword = "success"
                 is_up = True  # 找到关键词则认为成功
@@ -135,6 +439,14 @@ def real_check(url: str, keywords: List[str] = None) -> Dict[str, Any]:
             # 判断网站是否可用（HTTP 状态码 200-399 通常表示成功）
             is_up = 200 <= http_status < 400
         
+    except requests.exceptions.SSLError as e:
+        # SSLError 是 ConnectionError 的子类，必须先于 ConnectionError 捕获
+        latency_ms = int((time.time() - start_time) * 1000)
+        error_message = "SSL证书错误"
+        is_up = False
+        http_status = 0
+        ssl_result = {"ssl_status": "down", "ssl_error": f"SSL错误: {str(e)}"}
+
     except requests.exceptions.Timeout:
         latency_ms = int((time.time() - start_time) * 1000)
         error_message = "请求超时"
@@ -147,12 +459,6 @@ def real_check(url: str, keywords: List[str] = None) -> Dict[str, Any]:
         is_up = False
         http_status = 0
         
-    except requests.exceptions.SSLError:
-        latency_ms = int((time.time() - start_time) * 1000)
-        error_message = "SSL证书错误"
-        is_up = False
-        http_status = 0
-        
     except requests.exceptions.RequestException as e:
         latency_ms = int((time.time() - start_time) * 1000)
         error_message = f"请求异常: {str(e)}"
@@ -165,124 +471,221 @@ def real_check(url: str, keywords: List[str] = None) -> Dict[str, Any]:
         is_up = False
         http_status = 0
     
-    # 检查 SSL 证书状态
-    ssl_result = check_ssl_certificate(url)
+    # 请求未能确定证书状态时（非 HTTPS 或连接/超时等失败），单独检查 SSL 证书
+    if ssl_result is None:
+        ssl_result = check_ssl_certificate(url)
     
-    return {
-        "http_status": http_status,
-        "html_keyword": html_keyword,
-        "ssl_status": ssl_result["ssl_status"],
-        "status": "up" if is_up else "down",
-        "latency_ms": latency_ms,
-        "timestamp": time.time(),
-        "error": error_message,
-        "ssl_error": ssl_result["ssl_error"]
+    return CheckResult(
+        http_status=http_status,
+        html_keyword=html_keyword,
+        ssl_status=ssl_result["ssl_status"],
+        status="up" if is_up else "down",
+        latency_ms=latency_ms,
+        timestamp=time.time(),
+        error=error_message,
+        ssl_error=ssl_result["ssl_error"],
+    )
+
+
+def _record_result(site: Dict[str, Any], result: CheckResult,
+                   previous: Dict[str, Any], failure_threshold: int) -> Dict[str, Any]:
+    """
+    根据单个站点的检查结果写日志并触发 Telegram 通知。
+    previous 为该站点上一次的快照，返回新的快照条目（由调用方统一合并进快照）。
+    """
+    url = site.get("url", "")
+    name = site.get("name", "")
+
+    # 计算新的状态快照
+    previous_failures = int(previous.get("consecutive_failures", 0) or 0)
+    previous_status = previous.get("status", "unknown")
+    new_failures = previous_failures + 1 if result.status == "down" else 0
+
+    entry = {
+        "name": name,
+        "http_status": result.http_status,
+        "html_keyword": result.html_keyword,
+        "ssl_status": result.ssl_status,
+        "status": result.status,
+        "consecutive_failures": new_failures,
+        "latency_ms": result.latency_ms,
+        "timestamp": result.timestamp,
     }
 
+    # 记录日志（详细格式，包含所有检查结果）
+    ts_str = format_ts(int(result.timestamp))
+    error_info = result.error
+    ssl_error_info = result.ssl_error
+    
+    # 构建详细的日志行
+    log_line = (
+        f"[{ts_str}] name={name} url={url} status={result.status} "
+        f"http={result.http_status} ssl={result.ssl_status} "
+        f"keyword={result.html_keyword} latency_ms={result.latency_ms}"
+    )
+    
+    # 添加错误信息（如果有）
+    if error_info:
+        log_line += f" error={error_info}"
+    if ssl_error_info:
+        log_line += f" ssl_error={ssl_error_info}"
+    write_log_line(log_line)
+    
+    # Telegram 通知逻辑（简化版本，无去重功能）
+    if is_telegram_configured():
+        # 发送故障警报（当连续失败次数达到阈值时，但限制在阈值+3次内）
+        if result.status == "down" and new_failures >= failure_threshold and new_failures <= failure_threshold + 3:
+            try:
+                send_site_down_alert(
+                    site_name=name,
+                    site_url=url,
+                    consecutive_failures=new_failures,
+                    error_info=error_info
+                )
+                write_log_line(f"[TELEGRAM] 发送故障警报: {name} ({url}) - 连续失败 {new_failures} 次")
+            except Exception as e:
+                write_log_line(f"[TELEGRAM ERROR] 发送故障警报失败: {str(e)}")
+        
+        # 发送恢复通知（当从故障状态恢复到正常状态时）
+        elif result.status == "up" and previous_status == "down" and previous_failures >= failure_threshold:
+            try:
+                send_site_recovery_alert(
+                    site_name=name,
+                    site_url=url,
+                    latency_ms=result.latency_ms
+                )
+                write_log_line(f"[TELEGRAM] 发送恢复通知: {name} ({url}) - 响应延迟 {result.latency_ms} ms")
+            except Exception as e:
+                write_log_line(f"[TELEGRAM ERROR] 发送恢复通知失败: {str(e)}")
+
+    return entry
 
-def poll_once(sites: List[Dict[str, Any]]) -> None:
-    """对所有站点执行一次真实检测，写日志并更新快照。"""
+
+def _failed_result(error_message: str, latency_ms: int, http_status: int = 0) -> CheckResult:
+    """构造检查未能完成（超时或异常）时的结果，字段与 real_check 一致。"""
+    return CheckResult(
+        http_status=http_status,
+        html_keyword="-",
+        ssl_status="-",
+        status="down",
+        latency_ms=latency_ms,
+        timestamp=time.time(),
+        error=error_message,
+        ssl_error=None,
+    )
+
+
+async def _check_site_async(site: Dict[str, Any], worker_limit: asyncio.Semaphore,
+                            host_limit: asyncio.Semaphore) -> CheckResult:
+    """
+    在检查线程池中执行单个站点的 real_check，超过 CHECK_TIMEOUT_SECONDS 视为失败。
+    先取得所在主机的名额（host_limit），再取得线程池名额（worker_limit），之后才开始计时：
+    等待名额的时间不计入超时与响应时间。两个名额在检查线程结束时才归还。
+    """
+    loop = asyncio.get_running_loop()
+    await host_limit.acquire()
+    try:
+        await worker_limit.acquire()
+    except BaseException:
+        host_limit.release()
+        raise
+
+    start_time = time.time()
+    future = loop.run_in_executor(_check_executor, real_check, site.get("url", ""), site.get("keywords", ()))
+
+    def _release(done: "asyncio.Future[CheckResult]") -> None:
+        worker_limit.release()
+        host_limit.release()
+        # 超时后被放弃的检查也取一次异常，避免 "exception was never retrieved" 警告
+        if not done.cancelled():
+            done.exception()
+
+    future.add_done_callback(_release)
+    try:
+        # shield：超时只放弃等待，不取消仍在线程中运行的检查（名额随其结束才归还）
+        return await asyncio.wait_for(asyncio.shield(future), timeout=CHECK_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        latency_ms = int((time.time() - start_time) * 1000)
+        return _failed_result("检查超时", latency_ms, http_status=408)
+    except Exception as e:
+        latency_ms = int((time.time() - start_time) * 1000)
+        return _failed_result(f"检查异常: {str(e)}", latency_ms)
+
+
+async def _check_sites(sites: List[Dict[str, Any]]) -> List[CheckResult]:
+    """并发检查所有站点，按站点顺序返回结果（同一主机最多 CHECK_MAX_PER_HOST 个，总数最多 CHECK_MAX_WORKERS 个）。"""
+    worker_limit, host_limits = _check_limits()
+    checks = []
+    for site in sites:
+        host = (_parse_url(site.get("url", "")).hostname or "").lower()
+        host_limit = host_limits.get(host)
+        if host_limit is None:
+            host_limit = host_limits[host] = asyncio.Semaphore(CHECK_MAX_PER_HOST)
+        checks.append(_check_site_async(site, worker_limit, host_limit))
+    return await asyncio.gather(*checks)
+
+
+async def poll_once_async(sites: List[Dict[str, Any]]) -> None:
+    """
+    并发检测所有站点：每个站点的阻塞检查交给共享的检查线程池执行（同一主机最多 CHECK_MAX_PER_HOST 个），
+    通过 asyncio.gather 同时等待，一轮耗时约为最慢站点的耗时而非总和。
+    单个站点超时或异常只记为该站点失败，不影响其余站点。
+    结果按站点顺序在事件循环线程中统一记录，整轮的快照更新在锁内一次性合并。
+    """
     # 获取连续失败阈值
     failure_threshold = get_failure_threshold()
-    
-    for site in sites:
+
+    results = await _check_sites(sites)
+
+    new_entries: Dict[str, Dict[str, Any]] = {}
+    for site, result in zip(sites, results, strict=True):
         url = site.get("url", "")
-        name = site.get("name", "")
-        keywords = site.get("keywords", [])  # 获取关键词列表
-        
-        result = real_check(url, keywords)
-
-        # 更新状态快照
-        previous = latest_status_snapshot.get(url, {})
-        previous_failures = int(previous.get("consecutive_failures", 0) or 0)
-        previous_status = previous.get("status", "unknown")
-        new_failures = previous_failures + 1 if result["status"] == "down" else 0
-
-        latest_status_snapshot[url] = {
-            "name": name,
-            "http_status": result["http_status"],
-            "html_keyword": result["html_keyword"],
-            "ssl_status": result["ssl_status"],
-            "status": result["status"],
-            "consecutive_failures": new_failures,
-            "latency_ms": result["latency_ms"],
-            "timestamp": result["timestamp"],
-        }
+        previous = new_entries.get(url) or latest_status_snapshot.get(url, {})
+        new_entries[url] = _record_result(site, result, previous, failure_threshold)
 
-        # 记录日志（详细格式，包含所有检查结果）
-        ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result["timestamp"]))
-        error_info = result.get('error', 'None')
-        ssl_error_info = result.get('ssl_error', 'None')
-        
-        # 构建详细的日志行
-        log_parts = [
-            f"[{ts_str}]",
-            f"name={name}",
-            f"url={url}",
-            f"status={result['status']}",
-            f"http={result['http_status']}",
-            f"ssl={result['ssl_status']}",
-            f"keyword={result['html_keyword']}",
-            f"latency_ms={result['latency_ms']}"
-        ]
-        
-        # 添加错误信息（如果有）
-        if error_info and error_info != 'None':
-            log_parts.append(f"error={error_info}")
-        if ssl_error_info and ssl_error_info != 'None':
-            log_parts.append(f"ssl_error={ssl_error_info}")
-            
-        log_line = " ".join(log_parts)
-        write_log_line(log_line)
-        
-        # Telegram 通知逻辑（简化版本，无去重功能）
-        if is_telegram_configured():
-            # 发送故障警报（当连续失败次数达到阈值时，但限制在阈值+3次内）
-            if result["status"] == "down" and new_failures >= failure_threshold and new_failures <= failure_threshold + 3:
-                try:
-                    send_site_down_alert(
-                        site_name=name,
-                        site_url=url,
-                        consecutive_failures=new_failures,
-                        error_info=error_info if error_info != 'None' else None
-                    )
-                    write_log_line(f"[TELEGRAM] 发送故障警报: {name} ({url}) - 连续失败 {new_failures} 次")
-                except Exception as e:
-                    write_log_line(f"[TELEGRAM ERROR] 发送故障警报失败: {str(e)}")
-            
-            # 发送恢复通知（当从故障状态恢复到正常状态时）
-            elif result["status"] == "up" and previous_status == "down" and previous_failures >= failure_threshold:
-                try:
-                    send_site_recovery_alert(
-                        site_name=name,
-                        site_url=url,
-                        latency_ms=result["latency_ms"]
-                    )
-                    write_log_line(f"[TELEGRAM] 发送恢复通知: {name} ({url}) - 响应延迟 {result['latency_ms']} ms")
-                except Exception as e:
-                    write_log_line(f"[TELEGRAM ERROR] 发送恢复通知失败: {str(e)}")
+    new_cells = {
+        url: (*_entry_cells(entry), format_ts(int(entry["timestamp"])))
+        for url, entry in new_entries.items()
+    }
+
+    global _snapshot_version
+    with _snapshot_lock:
+        latest_status_snapshot.update(new_entries)
+        latest_status_cells.update(new_cells)
+        _snapshot_version += 1
+
+
+def poll_once(sites: List[Dict[str, Any]]) -> None:
+    """对所有站点执行一次真实检测，写日志并更新快照（同步入口）。"""
+    asyncio.run(poll_once_async(sites))
 
 
 def start_background_polling(get_sites_callable, interval_seconds: int = 30) -> threading.Thread:
     """
-    启动后台线程，按固定间隔轮询站点。
+    启动后台线程，线程内运行独立的 asyncio 事件循环，按固定间隔轮询站点。
     get_sites_callable: 一个可调用对象，返回当前站点列表（例如 storage.load_sites）。
     返回线程对象，以便在 app 退出时进行控制。
     """
     ensure_log_file()
 
-    def _loop():
+    async def _poll_forever():
         while True:
             try:
                 sites = get_sites_callable()
-                poll_once(sites)
+                await poll_once_async(sites)
             except Exception as e:
-                # 任何异常写日志但不中断线程
+                # 任何异常写日志但不中断循环
                 write_log_line(f"[ERROR] polling exception: {e}")
-            time.sleep(interval_seconds)
+            await asyncio.sleep(interval_seconds)
+
+    def _run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_poll_forever())
+        finally:
+            loop.close()
 
-    t = threading.Thread(target=_loop, daemon=True)
+    t = threading.Thread(target=_run, daemon=True)
     t.start()
     return t
-
-
@@ -5,14 +5,36 @@ storage.py
 仅做简单的 JSON 文件读写，保证新手易读易用。
 """
 
+import hashlib
 import json
 import os
-from typing import List, Dict, Any
+import shutil
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import orjson
 
 
 # 数据文件路径常量，集中管理，便于其他模块引用
 SITES_FILE_PATH = os.path.join(os.path.dirname(__file__), "sites.json")
 
+# 上次写入内容的摘要及写入后文件的 (mtime_ns, size)；内容未变且文件未被外部修改时跳过重写
+_last_saved: Optional[Tuple[bytes, Tuple[int, int]]] = None
+_save_lock = threading.Lock()
+
+# load_sites 的解析缓存：(文件 (mtime_ns, size), 站点列表)；文件未变化时不重复解析
+_load_cache: Optional[Tuple[Tuple[int, int], List[Dict[str, Any]]]] = None
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """返回文件的 (修改时间, 大小)，文件不存在时返回 None。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
 
 def ensure_sites_file_exists() -> None:
     """如果 sites.json 不存在，则创建一个包含空列表的文件。"""
@@ -30,23 +52,80 @@ def load_sites() -> List[Dict[str, Any]]:
         ...
     ]
     """
+    global _load_cache
     ensure_sites_file_exists()
+    signature = _file_signature(SITES_FILE_PATH)
+    cache = _load_cache
+    if cache is not None and signature is not None and cache[0] == signature:
+        # 文件未变化，直接复用上次解析结果（返回列表副本，调用方增删不影响缓存）
+        return list(cache[1])
+
     try:
-        with open(SITES_FILE_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
+        with open(SITES_FILE_PATH, "rb") as f:
+            data = orjson.loads(f.read())
     except json.JSONDecodeError:
         # 若文件损坏/格式错误，返回空列表，避免程序崩溃
-        return []
+        data = []
+    if not isinstance(data, list):
+        data = []
+    _normalize_sites(data)
+    if signature is not None:
+        _load_cache = (signature, data)
+    return list(data)
+
+
+def get_cached_sites() -> List[Dict[str, Any]]:
+    """
+    返回内存中的站点列表，不访问磁盘（尚未加载过时才读取文件）。
+    本进程的保存会同步更新该列表；外部对 sites.json 的修改在下一次 load_sites() 时生效。
+    """
+    cache = _load_cache
+    if cache is None:
+        return load_sites()
+    return list(cache[1])
+
+
+def _normalize_sites(sites: List[Dict[str, Any]]) -> None:
+    """关键词统一转为元组：可哈希，监控模块可按关键词缓存编译结果。"""
+    for site in sites:
+        if isinstance(site, dict) and "keywords" in site:
+            site["keywords"] = tuple(site["keywords"] or ())
 
 
 def save_sites(sites: List[Dict[str, Any]]) -> None:
-    """将站点列表写回到 sites.json。"""
-    # 简单直接地覆盖写入；本项目强调可读性而非并发安全
-    with open(SITES_FILE_PATH, "w", encoding="utf-8") as f:
-        json.dump(sites, f, ensure_ascii=False, indent=2)
+    """
+    将站点列表写回到 sites.json。
+    先写入同目录临时文件再原子替换，写入中途崩溃也不会损坏原文件；内容未变化时不重写。
+    """
+    global _last_saved, _load_cache
+    data = orjson.dumps(sites, option=orjson.OPT_INDENT_2)
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    with _save_lock:
+        if _last_saved is not None and _last_saved == (digest, _file_signature(SITES_FILE_PATH)):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(SITES_FILE_PATH), prefix=".sites.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(SITES_FILE_PATH):
+                shutil.copymode(SITES_FILE_PATH, tmp_path)
+            os.replace(tmp_path, SITES_FILE_PATH)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        signature = _file_signature(SITES_FILE_PATH)
+        _last_saved = (digest, signature)
+        # 写入成功后直接更新读取缓存，无需重新读取文件；
+        # 缓存由刚写出的内容解析得到，与调用方的列表和字典互不共享，规范化不会改动调用方的数据
+        if signature is not None:
+            saved = orjson.loads(data)
+            _normalize_sites(saved)
+            _load_cache = (signature, saved)
 
 
 def add_site(name: str, url: str) -> List[Dict[str, Any]]:
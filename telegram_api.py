@@ -0,0 +1,50 @@
+"""
+telegram_api.py
+
+Telegram Bot API 的公共 HTTP 访问封装。
+通知模块与聊天机器人模块共用同一个会话，复用到 api.telegram.org 的 TCP/TLS 连接。
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 连接失败、限流（429）及服务端错误时自动重试，按 0.3s 起步指数退避；
+# 状态码重试仅针对幂等请求（GET），避免 sendMessage 重复发送
+_RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+
+# (连接超时, 读取超时)：连接阶段快速失败并交给重试，读取阶段留足等待时间
+REQUEST_TIMEOUT: Tuple[float, float] = (3.05, 10)
+LONG_POLL_TIMEOUT: Tuple[float, float] = (3.05, 55)  # getUpdates 长轮询（服务端最多挂起 50 秒）
+
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=_RETRY))
+
+
+class BotEndpoints:
+    """某个 Bot Token 下各 API 方法的完整地址（构造一次，之后按属性读取）"""
+    __slots__ = ("getMe", "getUpdates", "sendMessage", "setWebhook", "deleteWebhook")
+
+    def __init__(self, bot_token: str) -> None:
+        base = f"https://api.telegram.org/bot{bot_token}/"
+        for method in self.__slots__:
+            setattr(self, method, base + method)
+
+
+@lru_cache(maxsize=4)
+def endpoints(bot_token: str) -> BotEndpoints:
+    """按 Token 缓存 API 地址，例如 endpoints(token).sendMessage"""
+    return BotEndpoints(bot_token)
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def post_json(url: str, payload: Dict[str, Any], timeout: Tuple[float, float] = REQUEST_TIMEOUT) -> requests.Response:
+    """以 JSON 请求体（orjson 序列化，UTF-8 原样输出）调用 Bot API"""
+    return SESSION.post(url, data=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=timeout)
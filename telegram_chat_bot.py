@@ -8,8 +8,57 @@ Telegram 聊天机器人模块。
 import requests
 import time
 import json
+import os
+import tempfile
 from typing import Optional, Dict, Any
 from telegram_config import load_config
+from telegram_api import SESSION, REQUEST_TIMEOUT, LONG_POLL_TIMEOUT, endpoints, post_json
+
+
+# getUpdates 偏移量持久化文件：重启后从上次位置继续，避免重复处理已收到的消息。
+# 文件同时记录所属机器人的 ID 与保存时间：更换 Token 后不会沿用其他机器人的偏移量
+OFFSET_FILE_PATH = os.path.join(os.path.dirname(__file__), "telegram_offset.json")
+# Telegram 在一周没有新消息后会随机重新选取 update_id，更早保存的偏移量可能大于新的 update_id
+_OFFSET_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+def load_update_offset(bot_id: int) -> int:
+    """
+    读取 bot_id 对应机器人上次保存的 getUpdates 偏移量。
+    文件不存在或损坏、属于其他机器人、或保存已超过一周时返回 0（从头获取未确认的消息）。
+    """
+    try:
+        with open(OFFSET_FILE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("bot_id") != bot_id:
+            return 0
+        if time.time() - float(data.get("saved_at", 0)) >= _OFFSET_MAX_AGE_SECONDS:
+            return 0
+        return int(data.get("offset", 0))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 0
+
+
+def save_update_offset(offset: int, bot_id: int) -> None:
+    """保存 bot_id 对应机器人的 getUpdates 偏移量（紧凑 JSON 写入临时文件并落盘后原子替换，写入中途崩溃不会损坏原文件）。"""
+    data = json.dumps(
+        {"bot_id": bot_id, "offset": offset, "saved_at": int(time.time())}, separators=(",", ":")
+    ).encode("utf-8")
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(OFFSET_FILE_PATH), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, OFFSET_FILE_PATH)
+    except OSError as e:
+        print(f"⚠️  保存消息偏移量失败: {str(e)}")
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
 
 
 def get_bot_info(bot_token: str) -> Optional[Dict[str, Any]]:
@@ -22,10 +71,10 @@ def get_bot_info(bot_token: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dict: 机器人信息，如果失败返回 None
     """
-    url = f"https://api.telegram.org/bot{bot_token}/getMe"
+    url = endpoints(bot_token).getMe
     
     try:
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
         result = response.json()
@@ -54,16 +103,17 @@ def get_updates(bot_token: str, offset: int = 0) -> Optional[list]:
     Returns:
         list: 消息列表，如果失败返回 None
     """
-    url = f"https://api.telegram.org/bot{bot_token}/getUpdates"
+    url = endpoints(bot_token).getUpdates
     
     params = {
         "offset": offset,
-        "timeout": 30,  # 长轮询30秒
+        "timeout": 50,  # 长轮询50秒：无新消息时由服务端挂起等待
+        "limit": 100,  # 单次最多取回100条，尽量一次取完积压消息
         "allowed_updates": ["message"]  # 只接收消息更新
     }
     
     try:
-        response = requests.get(url, params=params, timeout=35)
+        response = SESSION.get(url, params=params, timeout=LONG_POLL_TIMEOUT)
         response.raise_for_status()
         
         result = response.json()
@@ -93,17 +143,17 @@ def send_message(bot_token: str, chat_id: str, message: str) -> bool:
     Returns:
         bool: 发送是否成功
     """
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = endpoints(bot_token).sendMessage
     
     data = {
         "chat_id": chat_id,
         "text": message,
         "parse_mode": "HTML",
-        "disable_web_page_preview": True
+        "link_preview_options": {"is_disabled": True}  # 不显示链接预览
     }
     
     try:
-        response = requests.post(url, data=data, timeout=10)
+        response = post_json(url, data)
         response.raise_for_status()
         
         result = response.json()
@@ -121,6 +171,63 @@ def send_message(bot_token: str, chat_id: str, message: str) -> bool:
         return False
 
 
+def set_webhook(bot_token: str, webhook_url: str, secret_token: str) -> bool:
+    """
+    设置 Webhook，此后 Telegram 将消息主动推送到 webhook_url。
+    
+    Args:
+        bot_token: 机器人 Token
+        webhook_url: 公网可访问的 HTTPS 地址
+        secret_token: Telegram 推送时携带在请求头中的校验令牌
+        
+    Returns:
+        bool: 设置是否成功
+    """
+    url = endpoints(bot_token).setWebhook
+    
+    data = {
+        "url": webhook_url,
+        "secret_token": secret_token,
+        "allowed_updates": ["message"]  # 只接收消息更新
+    }
+    
+    try:
+        response = post_json(url, data)
+        response.raise_for_status()
+        
+        result = response.json()
+        if result.get("ok"):
+            return True
+        else:
+            print(f"❌ 设置 Webhook 失败: {result.get('description', '未知错误')}")
+            return False
+            
+    except requests.exceptions.RequestException as e:
+        print(f"❌ 设置 Webhook 异常: {str(e)}")
+        return False
+
+
+def delete_webhook(bot_token: str) -> bool:
+    """
+    删除 Webhook（设置了 Webhook 时 getUpdates 长轮询不可用）。
+    
+    Args:
+        bot_token: 机器人 Token
+        
+    Returns:
+        bool: 删除是否成功
+    """
+    url = endpoints(bot_token).deleteWebhook
+    
+    try:
+        response = SESSION.post(url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return bool(response.json().get("ok"))
+    except requests.exceptions.RequestException as e:
+        print(f"❌ 删除 Webhook 异常: {str(e)}")
+        return False
+
+
 def process_message(update: Dict[str, Any], bot_token: str) -> Optional[str]:
     """
     处理收到的消息。
@@ -168,10 +275,41 @@ def process_message(update: Dict[str, Any], bot_token: str) -> Optional[str]:
         return None
 
 
+def handle_update(update: Dict[str, Any], bot_token: str, saved_chat_ids: set) -> None:
+    """
+    处理一条更新（长轮询与 Webhook 两种模式共用）。
+    
+    Args:
+        update: 消息更新数据
+        bot_token: 机器人 Token
+        saved_chat_ids: 已提示过配置信息的聊天 ID 集合
+    """
+    # 只处理消息类型的更新
+    if "message" not in update:
+        return
+    try:
+        chat_id = process_message(update, bot_token)
+    except Exception as e:
+        print(f"❌ 处理消息异常: {str(e)}")
+        return
+    
+    # 如果成功获取到 chat_id 且未保存过，则显示配置信息
+    if chat_id and chat_id not in saved_chat_ids:
+        print(f"💾 获取到聊天 ID: {chat_id}")
+        print("⚠️  注意：配置现在只能通过环境变量设置")
+        print(f"   请设置环境变量: TELEGRAM_CHAT_ID={chat_id}")
+        print(f"   并设置: TELEGRAM_ENABLED=true")
+        saved_chat_ids.add(chat_id)
+
+
 def start_chat_bot():
     """
     启动聊天机器人，监听消息并自动获取 chat_id。
+    设置了 UPTIMEGUARD_WEBHOOK_URL 时使用 Webhook 模式，否则使用 getUpdates 长轮询。
     """
+    # 延迟导入：telegram_webhook 依赖本模块
+    from telegram_webhook import get_webhook_url, run_webhook_server
+    
     print("🤖 启动 UptimeGuard Telegram 聊天机器人...")
     print("=" * 50)
     
@@ -207,40 +345,46 @@ def start_chat_bot():
         print("💡 发送消息后，新的聊天 ID 将覆盖当前配置")
         print()
     
-    last_update_id = 0
     saved_chat_ids = set()  # 记录已保存的聊天 ID
     
     try:
+        # 配置了 Webhook 地址时改用 Webhook 模式，由 Telegram 主动推送消息
+        webhook_url = get_webhook_url()
+        if webhook_url:
+            if run_webhook_server(bot_token, webhook_url, saved_chat_ids):
+                return
+            print("⚠️  Webhook 模式启动失败，改用长轮询模式")
+        
+        # 长轮询模式：先删除可能残留的 Webhook，否则 getUpdates 会被拒绝
+        delete_webhook(bot_token)
+        bot_id = bot_info.get("id")
+        offset = load_update_offset(bot_id)
+        last_update_at = time.monotonic()
         while True:
             # 获取新消息
-            updates = get_updates(bot_token, last_update_id + 1)
+            updates = get_updates(bot_token, offset)
             
             if updates is None:
                 print("⚠️  获取消息失败，5秒后重试...")
                 time.sleep(5)
                 continue
             
+            if not updates:
+                # 一周没有新消息后 update_id 可能重新编号，继续使用旧偏移量会收不到任何消息
+                if offset and time.monotonic() - last_update_at >= _OFFSET_MAX_AGE_SECONDS:
+                    offset = 0
+                continue
+            
+            # 先推进并保存偏移量再处理：处理中途出错或进程重启都不会重复处理这一批消息
+            # （Telegram 按 update_id 递增顺序返回，最后一条即最大值）
+            last_update_at = time.monotonic()
+            offset = updates[-1].get("update_id", 0) + 1
+            save_update_offset(offset, bot_id)
+            
             # 处理每条消息
             for update in updates:
-                update_id = update.get("update_id", 0)
-                last_update_id = max(last_update_id, update_id)
-                
-                # 只处理消息类型的更新
-                if "message" in update:
-                    chat_id = process_message(update, bot_token)
-                    
-                    # 如果成功获取到 chat_id 且未保存过，则显示配置信息
-                    if chat_id and chat_id not in saved_chat_ids:
-                        print(f"💾 获取到聊天 ID: {chat_id}")
-                        print("⚠️  注意：配置现在只能通过环境变量设置")
-                        print(f"   请设置环境变量: TELEGRAM_CHAT_ID={chat_id}")
-                        print(f"   并设置: TELEGRAM_ENABLED=true")
-                        saved_chat_ids.add(chat_id)
-            
-            # 如果没有新消息，等待一下再继续
-            if not updates:
-                time.sleep(1)
-                
+                handle_update(update, bot_token, saved_chat_ids)
+
     except KeyboardInterrupt:
         print("\n\n🛑 机器人已停止")
         print("=" * 50)
@@ -255,7 +399,7 @@ def start_chat_bot():
         else:
             print("⚠️  未获取到聊天 ID，请重新运行机器人并发送消息")
         
-        print("\n💡 提示: 运行 'python test_telegram.py' 测试通知功能")
+        print("\n💡 提示: 运行 'python telegram_chat_bot.py test' 测试通知功能")
 
 
 def test_chat_bot():
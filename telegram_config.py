@@ -6,13 +6,23 @@ Telegram 通知配置管理模块。
 """
 
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+
+# 连续失败阈值默认值
+_DEFAULT_FAILURE_THRESHOLD = 10
+
+# 相关环境变量名
+_ENV_KEYS = ("TELEGRAM_BOT_TOKEN", "TELEGRAM_CHAT_ID", "TELEGRAM_ENABLED", "TELEGRAM_FAILURE_THRESHOLD")
+
+# 配置缓存：(环境变量取值, 解析后的配置)；环境变量不变时直接复用解析结果
+_cache: Optional[Tuple[Tuple[Optional[str], ...], Dict[str, Any]]] = None
 
 
 def load_config() -> Dict[str, Any]:
     """
     加载 Telegram 配置。
-    仅从环境变量读取配置。
+    仅从环境变量读取配置；环境变量未变化时复用上次的解析结果。
     
     返回配置字典，包含：
     - bot_token: Telegram Bot Token
@@ -20,25 +30,37 @@ def load_config() -> Dict[str, Any]:
     - enabled: 是否启用通知
     - failure_threshold: 连续失败阈值
     """
+    global _cache
+    env_key = tuple(os.environ.get(key) for key in _ENV_KEYS)
+    cache = _cache
+    if cache is not None and cache[0] == env_key:
+        return dict(cache[1])
+    
     # 从环境变量读取配置
     bot_token = os.getenv("TELEGRAM_BOT_TOKEN", "")
     chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
     enabled = os.getenv("TELEGRAM_ENABLED", "false").lower() == "true"
-    failure_threshold = int(os.getenv("TELEGRAM_FAILURE_THRESHOLD", "10"))
+    try:
+        failure_threshold = int(os.getenv("TELEGRAM_FAILURE_THRESHOLD", str(_DEFAULT_FAILURE_THRESHOLD)))
+    except ValueError:
+        # 取值无效时使用默认阈值，避免每次加载配置都抛异常
+        print(f"⚠️  TELEGRAM_FAILURE_THRESHOLD 取值无效，使用默认值 {_DEFAULT_FAILURE_THRESHOLD}")
+        failure_threshold = _DEFAULT_FAILURE_THRESHOLD
     
-    return {
+    config = {
         "bot_token": bot_token,
         "chat_id": chat_id,
         "enabled": enabled,
         "failure_threshold": failure_threshold
     }
+    _cache = (env_key, config)
+    return dict(config)
 
 
-
-
-def is_telegram_configured() -> bool:
-    """检查 Telegram 是否已正确配置。"""
-    config = load_config()
+def is_telegram_configured(config: Optional[Dict[str, Any]] = None) -> bool:
+    """检查 Telegram 是否已正确配置。已持有配置时可直接传入，避免重复加载。"""
+    if config is None:
+        config = load_config()
     return bool(config["bot_token"] and config["chat_id"] and config["enabled"])
 
 
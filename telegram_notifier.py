@@ -6,9 +6,42 @@ Telegram 通知发送模块。
 """
 
 import requests
+import queue
+import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from telegram_config import load_config, is_telegram_configured
+from telegram_api import endpoints, post_json
+
+
+# 通知消息模板（模块加载时构造一次，发送时仅做字段填充）
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+_DOWN_TPL = (
+    "🚨 <b>网站监控警报</b>\n"
+    "\n"
+    "📊 <b>网站信息:</b>\n"
+    "• 名称: {name}\n"
+    "• URL: {url}\n"
+    "• 连续失败: {fails} 次\n"
+    "\n"
+    "⏰ <b>检测时间:</b> {ts}\n"
+    "\n"
+    "⚠️ <b>状态:</b> 网站不可访问"
+).format_map
+
+_RECOVERY_TPL = (
+    "✅ <b>网站恢复通知</b>\n"
+    "\n"
+    "📊 <b>网站信息:</b>\n"
+    "• 名称: {name}\n"
+    "• URL: {url}\n"
+    "• 响应延迟: {latency} ms\n"
+    "\n"
+    "⏰ <b>恢复时间:</b> {ts}\n"
+    "\n"
+    "🎉 <b>状态:</b> 网站已恢复正常访问"
+).format_map
 
 
 def send_telegram_message(message: str) -> bool:
@@ -21,27 +54,27 @@ def send_telegram_message(message: str) -> bool:
     Returns:
         bool: 发送是否成功
     """
-    if not is_telegram_configured():
+    config = load_config()
+    if not is_telegram_configured(config):
         print("⚠️  Telegram 未配置或未启用，跳过通知发送")
         return False
     
-    config = load_config()
     bot_token = config["bot_token"]
     chat_id = config["chat_id"]
     
     # Telegram Bot API URL
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+    url = endpoints(bot_token).sendMessage
     
     # 消息数据
     data = {
         "chat_id": chat_id,
         "text": message,
         "parse_mode": "HTML",  # 支持 HTML 格式
-        "disable_web_page_preview": True
+        "link_preview_options": {"is_disabled": True}  # 不显示链接预览
     }
     
     try:
-        response = requests.post(url, data=data, timeout=10)
+        response = post_json(url, data)
         response.raise_for_status()
         
         result = response.json()
@@ -60,6 +93,47 @@ def send_telegram_message(message: str) -> bool:
         return False
 
 
+# 告警发送队列：监控线程只负责入队，由单个后台线程依次发送，慢速或限流的 Telegram 请求不会阻塞检查
+_QUEUE: "queue.Queue[str]" = queue.Queue(maxsize=1000)
+_SEND_INTERVAL_SECONDS = 0.05  # 两次发送之间的间隔，低于 Telegram 全局 30 条/秒的限制
+_worker_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+
+
+def _send_worker() -> None:
+    """后台发送线程：逐条取出队列中的消息并发送。"""
+    while True:
+        message = _QUEUE.get()
+        try:
+            send_telegram_message(message)
+        except Exception as e:
+            print(f"❌ Telegram 后台发送异常: {str(e)}")
+        finally:
+            _QUEUE.task_done()
+        time.sleep(_SEND_INTERVAL_SECONDS)
+
+
+def enqueue_telegram_message(message: str) -> bool:
+    """
+    将消息加入后台发送队列，立即返回（首次调用时启动发送线程）。
+    
+    Returns:
+        bool: 是否成功入队；队列已满时丢弃消息并返回 False
+    """
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_send_worker, name="telegram-sender", daemon=True)
+                _worker.start()
+    try:
+        _QUEUE.put_nowait(message)
+        return True
+    except queue.Full:
+        print(f"⚠️  Telegram 发送队列已满，丢弃通知: {message[:50]}...")
+        return False
+
+
 def format_site_down_message(site_name: str, site_url: str, 
                            consecutive_failures: int, 
                            error_info: str = None) -> str:
@@ -75,18 +149,12 @@ def format_site_down_message(site_name: str, site_url: str,
     Returns:
         str: 格式化的消息
     """
-    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-    
-    message = f"""🚨 <b>网站监控警报</b>
-
-📊 <b>网站信息:</b>
-• 名称: {site_name}
-• URL: {site_url}
-• 连续失败: {consecutive_failures} 次
-
-⏰ <b>检测时间:</b> {timestamp}
-
-⚠️ <b>状态:</b> 网站不可访问"""
+    message = _DOWN_TPL({
+        "name": site_name,
+        "url": site_url,
+        "fails": consecutive_failures,
+        "ts": time.strftime(_TS_FMT),
+    })
 
     if error_info and error_info != "None":
         message += f"\n\n🔍 <b>错误详情:</b> {error_info}"
@@ -109,56 +177,127 @@ def format_site_recovery_message(site_name: str, site_url: str,
     Returns:
         str: 格式化的消息
     """
-    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+    message = _RECOVERY_TPL({
+        "name": site_name,
+        "url": site_url,
+        "latency": latency_ms,
+        "ts": time.strftime(_TS_FMT),
+    })
     
-    message = f"""✅ <b>网站恢复通知</b>
+    return message
 
-📊 <b>网站信息:</b>
-• 名称: {site_name}
-• URL: {site_url}
-• 响应延迟: {latency_ms} ms
 
-⏰ <b>恢复时间:</b> {timestamp}
+# 告警合并：窗口期内产生的警报合并为一条消息，避免大面积故障时逐站点发送触发 Telegram 限流
+_COALESCE_WINDOW_SECONDS = 2.0
+_COALESCE_MAX_ITEMS = 20  # 每条合并消息最多包含的站点数
+_pending_lock = threading.Lock()
+_pending: Dict[str, List[Tuple[Any, ...]]] = {"down": [], "recovery": []}
+_flush_timer: Optional[threading.Timer] = None
 
-🎉 <b>状态:</b> 网站已恢复正常访问"""
-    
-    return message
+_DOWN_BATCH_TPL = (
+    "🚨 <b>网站监控警报</b>（{count} 个网站不可访问）\n"
+    "\n"
+    "{items}\n"
+    "\n"
+    "⏰ <b>检测时间:</b> {ts}\n"
+    "\n"
+    "请及时检查网站状态！"
+).format_map
+
+_RECOVERY_BATCH_TPL = (
+    "✅ <b>网站恢复通知</b>（{count} 个网站已恢复）\n"
+    "\n"
+    "{items}\n"
+    "\n"
+    "⏰ <b>恢复时间:</b> {ts}"
+).format_map
+
+
+def _format_down_batch(alerts: List[Tuple[Any, ...]]) -> str:
+    """将多条故障警报格式化为一条消息；只有一条时沿用单站点格式。"""
+    if len(alerts) == 1:
+        return format_site_down_message(*alerts[0])
+    items = []
+    for name, url, failures, error_info in alerts:
+        item = f"• {name} ({url}) - 连续失败 {failures} 次"
+        if error_info and error_info != "None":
+            item += f" - {error_info}"
+        items.append(item)
+    return _DOWN_BATCH_TPL({"count": len(alerts), "items": "\n".join(items), "ts": time.strftime(_TS_FMT)})
+
+
+def _format_recovery_batch(alerts: List[Tuple[Any, ...]]) -> str:
+    """将多条恢复通知格式化为一条消息；只有一条时沿用单站点格式。"""
+    if len(alerts) == 1:
+        return format_site_recovery_message(*alerts[0])
+    items = "\n".join(f"• {name} ({url}) - 响应延迟 {latency} ms" for name, url, latency in alerts)
+    return _RECOVERY_BATCH_TPL({"count": len(alerts), "items": items, "ts": time.strftime(_TS_FMT)})
+
+
+def _log_dropped_alerts(label: str, alerts: List[Tuple[Any, ...]]) -> None:
+    """发送队列已满时，把被丢弃的警报记入监控日志（而不仅是打印到控制台）。"""
+    # 延迟导入：monitor 在模块加载时导入本模块
+    from monitor import write_log_line
+    sites = ", ".join(f"{alert[0]} ({alert[1]})" for alert in alerts)
+    write_log_line(f"[TELEGRAM ERROR] 发送队列已满，{label}被丢弃: {sites}")
+
+
+def _flush_pending_alerts() -> None:
+    """定时器回调：取出窗口期内积累的警报，按类型合并后加入发送队列。"""
+    global _flush_timer
+    with _pending_lock:
+        down, _pending["down"] = _pending["down"], []
+        recovery, _pending["recovery"] = _pending["recovery"], []
+        _flush_timer = None
+    for alerts, formatter, label in (
+        (down, _format_down_batch, "故障警报"),
+        (recovery, _format_recovery_batch, "恢复通知"),
+    ):
+        for i in range(0, len(alerts), _COALESCE_MAX_ITEMS):
+            batch = alerts[i:i + _COALESCE_MAX_ITEMS]
+            if not enqueue_telegram_message(formatter(batch)):
+                _log_dropped_alerts(label, batch)
+
+
+def _add_pending_alert(kind: str, alert: Tuple[Any, ...]) -> None:
+    """记录一条待发送警报；窗口期内的第一条警报负责启动合并发送定时器。"""
+    global _flush_timer
+    with _pending_lock:
+        _pending[kind].append(alert)
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(_COALESCE_WINDOW_SECONDS, _flush_pending_alerts)
+            _flush_timer.daemon = True
+            _flush_timer.start()
 
 
 def send_site_down_alert(site_name: str, site_url: str, 
                         consecutive_failures: int, 
-                        error_info: str = None) -> bool:
+                        error_info: str = None) -> None:
     """
-    发送网站故障警报。
+    发送网站故障警报（短时间内的多条警报合并后加入后台发送队列，不等待发送结果；
+    队列已满而被丢弃时记入监控日志）。
     
     Args:
         site_name: 网站名称
         site_url: 网站URL
         consecutive_failures: 连续失败次数
         error_info: 错误信息
-        
-    Returns:
-        bool: 发送是否成功
     """
-    message = format_site_down_message(site_name, site_url, consecutive_failures, error_info)
-    return send_telegram_message(message)
+    _add_pending_alert("down", (site_name, site_url, consecutive_failures, error_info))
 
 
 def send_site_recovery_alert(site_name: str, site_url: str, 
-                           latency_ms: int) -> bool:
+                           latency_ms: int) -> None:
     """
-    发送网站恢复通知。
+    发送网站恢复通知（短时间内的多条通知合并后加入后台发送队列，不等待发送结果；
+    队列已满而被丢弃时记入监控日志）。
     
     Args:
         site_name: 网站名称
         site_url: 网站URL
         latency_ms: 响应延迟（毫秒）
-        
-    Returns:
-        bool: 发送是否成功
     """
-    message = format_site_recovery_message(site_name, site_url, latency_ms)
-    return send_telegram_message(message)
+    _add_pending_alert("recovery", (site_name, site_url, latency_ms))
 
 
 def test_telegram_connection() -> bool:
@@ -0,0 +1,111 @@
+"""
+telegram_webhook.py
+
+Telegram Webhook 模式：由 Telegram 主动推送消息到本服务，替代 getUpdates 长轮询，
+消息送达无需等待下一次轮询返回，也不必长期占用一个轮询连接。
+
+设置环境变量 UPTIMEGUARD_WEBHOOK_URL（Telegram 可访问的公网 HTTPS 地址，例如反向代理地址）后启用：
+- UPTIMEGUARD_WEBHOOK_PORT: 本地监听端口，默认 8443
+- UPTIMEGUARD_WEBHOOK_SECRET: 校验令牌（仅限 A-Z a-z 0-9 _ -），未设置时每次启动随机生成
+"""
+
+import hmac
+import json
+import os
+import re
+import secrets
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Type
+
+from telegram_chat_bot import set_webhook, handle_update
+
+
+WEBHOOK_URL_ENV = "UPTIMEGUARD_WEBHOOK_URL"
+_DEFAULT_PORT = 8443
+_MAX_BODY_BYTES = 1024 * 1024
+# Telegram 对 secret_token 的要求：1-256 个 A-Z a-z 0-9 _ - 字符
+_SECRET_RE = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
+
+def get_webhook_url() -> str:
+    """返回配置的 Webhook 公网地址，未配置时返回空字符串（使用长轮询）。"""
+    return os.getenv(WEBHOOK_URL_ENV, "").strip().rstrip("/")
+
+
+def _make_handler(bot_token: str, path: str, secret: str, saved_chat_ids: set) -> Type[BaseHTTPRequestHandler]:
+    """构造处理 Telegram 推送请求的 Handler 类。"""
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            # 按字节比较：请求头可能含非 ASCII 字符，compare_digest 比较此类 str 时会抛出 TypeError
+            token = self.headers.get("X-Telegram-Bot-Api-Secret-Token", "").encode("utf-8", "surrogateescape")
+            if self.path != path or not hmac.compare_digest(token, secret.encode("ascii")):
+                self.send_error(403)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+            except ValueError:
+                length = -1
+            if not 0 <= length <= _MAX_BODY_BYTES:
+                self.send_error(400)
+                return
+            body = self.rfile.read(length)
+
+            # 先应答 200，Telegram 收到应答后即视为送达，再处理消息
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"OK")
+            self.wfile.flush()
+
+            try:
+                update = json.loads(body)
+            except ValueError:
+                return
+            if isinstance(update, dict):
+                handle_update(update, bot_token, saved_chat_ids)
+
+        def log_message(self, format: str, *args) -> None:
+            # 不输出每个请求的访问日志
+            pass
+
+    return WebhookHandler
+
+
+def run_webhook_server(bot_token: str, public_url: str, saved_chat_ids: set) -> bool:
+    """
+    注册 Webhook 并启动 HTTP 服务接收推送（阻塞运行，Ctrl+C 停止）。
+
+    Args:
+        bot_token: 机器人 Token
+        public_url: Webhook 公网地址（不含 /webhook/ 路径）
+        saved_chat_ids: 已提示过配置信息的聊天 ID 集合
+
+    Returns:
+        bool: 令牌不合法、端口无法监听或注册 Webhook 失败而未能启动时返回 False
+    """
+    secret = os.getenv("UPTIMEGUARD_WEBHOOK_SECRET", "") or secrets.token_urlsafe(32)
+    if not _SECRET_RE.fullmatch(secret):
+        print("❌ UPTIMEGUARD_WEBHOOK_SECRET 只能包含 1-256 个 A-Z a-z 0-9 _ - 字符")
+        return False
+    try:
+        port = int(os.getenv("UPTIMEGUARD_WEBHOOK_PORT", str(_DEFAULT_PORT)))
+    except ValueError:
+        port = _DEFAULT_PORT
+    path = f"/webhook/{secret}"
+
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), _make_handler(bot_token, path, secret, saved_chat_ids))
+    except OSError as e:
+        print(f"❌ Webhook 服务无法监听端口 {port}: {str(e)}")
+        return False
+    server.daemon_threads = True
+    try:
+        if not set_webhook(bot_token, public_url + path, secret):
+            print("❌ Webhook 注册失败，请检查 UPTIMEGUARD_WEBHOOK_URL 是否为可访问的 HTTPS 地址")
+            return False
+        print(f"🌐 Webhook 模式已启用，监听端口 {port}")
+        server.serve_forever()
+        return True
+    finally:
+        server.server_close()
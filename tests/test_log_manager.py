@@ -0,0 +1,51 @@
+"""
+LogManager 关闭后的行为测试：关闭后继续记录日志或刷盘不应阻塞。
+
+运行：python -m unittest discover -s tests
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from log_manager import LogManager
+
+
+class LogManagerCloseTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.manager = LogManager(os.path.join(self._tmp.name, "uptime.log"), console=False)
+        self.manager.flush_interval = 0.05
+        self.manager.log_message("before close")
+        self.manager.close()
+        # 确认写文件线程已退出：之后入队的日志不会再有人消费
+        self.manager._file_thread.join(2)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run_with_timeout(self, fn, timeout=2.0):
+        thread = threading.Thread(target=fn, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        self.assertFalse(thread.is_alive(), f"{fn.__name__} 在关闭后阻塞")
+
+    def test_log_after_close(self):
+        def log_then_flush():
+            self.manager.log_message("after close")
+            self.manager.flush()
+
+        self._run_with_timeout(log_then_flush)
+        # 关闭后的日志仍保留在内存历史中
+        self.assertIn("after close", self.manager.get_history_text(1))
+
+    def test_flush_after_close(self):
+        self._run_with_timeout(self.manager.flush)
+
+    def test_cleanup_after_close(self):
+        self._run_with_timeout(self.manager.cleanup_logs_now)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+日志框测试：大量页面同时等待新日志时，推送流不应占满 Gradio 同步处理函数所用的线程池；手动刷新显示最近的历史。
+
+运行：python -m unittest discover -s tests
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import anyio.to_thread
+
+import log_manager
+import ui
+
+
+class LogStreamTest(unittest.IsolatedAsyncioTestCase):
+    STREAMS = 60  # 超过 AnyIO 默认的 40 个工作线程
+
+    async def asyncSetUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._orig_path = ui.LOG_FILE_PATH
+        ui.LOG_FILE_PATH = os.path.join(self._tmp.name, "uptime.log")
+        # 每个用例使用独立的日志管理器，不影响进程内的单例
+        self._orig_singleton = log_manager._singleton
+        self.manager = log_manager._singleton = log_manager.LogManager(ui.LOG_FILE_PATH, console=False)
+        demo = ui.build_interface()
+        self.log_stream = next(f.fn for f in demo.fns.values() if f.fn.__name__ == "log_stream")
+
+    async def asyncTearDown(self):
+        self.manager.close()
+        log_manager._singleton = self._orig_singleton
+        ui.LOG_FILE_PATH = self._orig_path
+        self._tmp.cleanup()
+
+    async def test_streams_do_not_starve_sync_handlers(self):
+        streams = [self.log_stream(None) for _ in range(self.STREAMS)]
+        # 首次推送当前历史，之后各流进入等待
+        for stream in streams:
+            await stream.__anext__()
+        pending = [asyncio.ensure_future(stream.__anext__()) for stream in streams]
+        await asyncio.sleep(0.1)
+
+        # 普通同步处理函数与 Gradio 一样经由 AnyIO 默认线程池执行，不应排在推送流之后
+        result = await asyncio.wait_for(anyio.to_thread.run_sync(lambda: 42), timeout=2)
+        self.assertEqual(result, 42)
+
+        # 新日志到达后，所有推送流都应及时收到
+        self.manager.log_message("hello")
+        updates = await asyncio.wait_for(asyncio.gather(*pending), timeout=2)
+        for text, version in updates:
+            self.assertIn("hello", text)
+            self.assertEqual(version, self.manager.history_version)
+
+        for stream in streams:
+            await stream.aclose()
+
+    async def test_stream_yields_on_timeout(self):
+        """无新日志时超时也要交还控制权，页面关闭后 Gradio 才能结束该流"""
+        with mock.patch.object(self.manager, "wait_for_history_change",
+                               side_effect=lambda since, timeout: since):
+            stream = self.log_stream(0)
+            first = await asyncio.wait_for(stream.__anext__(), timeout=1)
+            self.assertEqual(first[0], ui.gr.skip())
+            await stream.aclose()
+
+    async def test_refresh_button_shows_recent_history(self):
+        """手动刷新始终显示最近的日志，而不是自上次读取以来的新增部分"""
+        demo = ui.build_interface()
+        on_refresh_logs = next(f.fn for f in demo.fns.values() if f.fn.__name__ == "on_refresh_logs")
+        self.manager.log_message("first")
+        self.manager.log_message("second")
+        for _ in range(2):
+            text = on_refresh_logs()
+            self.assertIn("first", text)
+            self.assertIn("second", text)
+        self.assertEqual(text, self.manager.get_history_text(200))
+
+
+if __name__ == "__main__":
+    unittest.main()
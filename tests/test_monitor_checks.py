@@ -0,0 +1,70 @@
+"""
+站点检查并发测试：等待线程池名额的时间不计入超时，超时后的检查在真正结束前继续占用名额。
+
+运行：python -m unittest discover -s tests
+"""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import monitor
+
+
+def _up_result() -> monitor.CheckResult:
+    return monitor.CheckResult(200, "-", "-", "up", 1, time.time(), None, None)
+
+
+class CheckConcurrencyTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        patches = [
+            mock.patch.object(monitor, "_check_executor", self.executor),
+            mock.patch.object(monitor, "CHECK_MAX_WORKERS", 2),
+            mock.patch.object(monitor, "CHECK_TIMEOUT_SECONDS", 0.3),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_queued_checks_do_not_time_out(self):
+        """站点数超过线程数时，排队的健康站点不应被判为超时"""
+        def slow_check(url, keywords=()):
+            time.sleep(0.2)
+            return _up_result()
+
+        sites = [{"name": f"s{i}", "url": f"http://host{i}.test/"} for i in range(4)]
+        with mock.patch.object(monitor, "real_check", side_effect=slow_check):
+            results = asyncio.run(monitor._check_sites(sites))
+        self.assertEqual([r.status for r in results], ["up"] * 4)
+
+    def test_timed_out_check_keeps_host_slot(self):
+        """超时返回后检查线程仍在运行，同一主机的下一个检查要等它结束"""
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def hung_check(url, keywords=()):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.5)
+            with lock:
+                running -= 1
+            return _up_result()
+
+        sites = [{"name": f"s{i}", "url": f"http://same.test/{i}"} for i in range(2)]
+        with mock.patch.object(monitor, "CHECK_MAX_PER_HOST", 1), \
+                mock.patch.object(monitor, "real_check", side_effect=hung_check):
+            results = asyncio.run(monitor._check_sites(sites))
+        self.assertEqual(results[0].error, "检查超时")
+        self.assertEqual(peak, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
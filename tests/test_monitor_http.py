@@ -0,0 +1,119 @@
+"""
+站点检查的 HTTP 测试：向本地 HTTP 服务发起真实请求，验证 DNS 缓存只作用于检查会话、HEAD 失败时回退为 GET。
+
+运行：python -m unittest discover -s tests
+"""
+
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+
+import monitor
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        body = b"hello"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class LocalServerTestCase(unittest.TestCase):
+    handler = _Handler
+
+    def setUp(self):
+        # HTTP/1.0 的服务每次应答后关闭连接，每个请求都要新建 TCP 连接
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.port = self.server.server_address[1]
+        self.url = f"http://localhost:{self.port}/"
+
+
+class DNSCacheTest(LocalServerTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(monitor._dns_cache, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.getaddrinfo = mock.patch.object(socket, "getaddrinfo", wraps=socket.getaddrinfo).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _lookups(self):
+        return [c for c in self.getaddrinfo.call_args_list if c.args[0] == "localhost"]
+
+    def test_checker_requests_reuse_cached_address(self):
+        for _ in range(3):
+            result = monitor.real_check(self.url)
+            self.assertEqual(result.status, "up")
+            self.assertEqual(result.http_status, 200)
+        self.assertEqual(len(self._lookups()), 1)
+        self.assertIn(("localhost", self.port, monitor.allowed_gai_family()), monitor._dns_cache)
+
+    def test_other_requests_are_not_cached(self):
+        for _ in range(2):
+            self.assertEqual(requests.get(self.url, timeout=5).status_code, 200)
+        self.assertEqual(len(self._lookups()), 2)
+        self.assertEqual(monitor._dns_cache, {})
+
+    def test_default_timeout_sentinel(self):
+        """urllib3 未设置超时时传入的是 _DEFAULT_TIMEOUT 哨兵而不是 None"""
+        with monitor._create_connection(("localhost", self.port), _DEFAULT_TIMEOUT) as sock:
+            self.assertEqual(sock.getpeername()[1], self.port)
+
+    def test_failed_connection_drops_cache_entry(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        with self.assertRaises(OSError):
+            monitor._create_connection(("localhost", port), 1)
+        self.assertNotIn(("localhost", port, monitor.allowed_gai_family()), monitor._dns_cache)
+
+
+class _RejectHeadHandler(_Handler):
+    """对 HEAD 返回错误状态、GET 正常的服务器"""
+    head_status = 403
+
+    def do_HEAD(self) -> None:
+        self.send_response(self.head_status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class HeadFallbackTest(LocalServerTestCase):
+    handler = _RejectHeadHandler
+
+    def test_head_error_falls_back_to_get(self):
+        for status in (400, 403, 404, 405, 500, 501):
+            with self.subTest(status=status), mock.patch.object(_RejectHeadHandler, "head_status", status):
+                result = monitor.real_check(self.url)
+                self.assertEqual(result.status, "up")
+                self.assertEqual(result.http_status, 200)
+
+    def test_get_error_is_reported(self):
+        with mock.patch.object(_Handler, "do_GET", lambda handler: handler.send_error(503)):
+            result = monitor.real_check(self.url)
+        self.assertEqual(result.status, "down")
+        self.assertEqual(result.http_status, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
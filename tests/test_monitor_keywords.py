@@ -0,0 +1,80 @@
+"""
+关键词检测测试：前缀树正则的构造、跨块边界的匹配、扫描字节上限与非 ASCII 关键词的大小写。
+
+运行：python -m unittest discover -s tests
+"""
+
+import unittest
+from unittest import mock
+
+import monitor
+
+
+class _FakeResponse:
+    """按给定的块返回响应体的最小响应对象"""
+
+    def __init__(self, chunks, encoding="utf-8"):
+        self.chunks = chunks
+        self.encoding = encoding
+        self.read = 0
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.chunks:
+            self.read += len(chunk)
+            yield chunk
+
+
+def _scan(chunks, keywords, encoding="utf-8"):
+    return monitor._scan_for_keywords(_FakeResponse(chunks, encoding), tuple(keywords))
+
+
+class TrieRegexSourceTest(unittest.TestCase):
+    def test_shared_prefix_branches(self):
+        self.assertEqual(monitor._trie_regex_source((b"abc", b"abd", b"x")), b"(?:ab[cd]|x)")
+
+    def test_shorter_keyword_wins(self):
+        self.assertEqual(monitor._trie_regex_source((b"abc", b"ab")), b"ab")
+        self.assertEqual(monitor._trie_regex_source((b"ab", b"abc")), b"ab")
+
+    def test_special_bytes_are_escaped(self):
+        self.assertEqual(monitor._trie_regex_source((b"a.b",)), b"a\\.b")
+
+
+class ScanForKeywordsTest(unittest.TestCase):
+    def test_ascii_keyword_ignores_case(self):
+        self.assertTrue(_scan([b"<html>Hello World</html>"], ["hello world"]))
+        self.assertFalse(_scan([b"<html>Hello</html>"], ["goodbye"]))
+
+    def test_keyword_split_across_chunks(self):
+        self.assertTrue(_scan([b"xxxxhel", b"lo"], ["hello"]))
+        self.assertTrue(_scan([b"h", b"e", b"l", b"l", b"o"], ["hello"]))
+        # 中文关键词的多字节编码被块边界截断
+        data = "状态正常".encode("utf-8")
+        self.assertTrue(_scan([data[:4], data[4:]], ["状态正常"]))
+
+    def test_page_encoding(self):
+        self.assertTrue(_scan(["欢迎访问".encode("gbk")], ["欢迎"], encoding="gbk"))
+
+    def test_scan_stops_at_byte_limit(self):
+        chunk = b"x" * monitor._KEYWORD_CHUNK_SIZE
+        chunks = [chunk] * (monitor.KEYWORD_SCAN_MAX_BYTES // len(chunk)) + [b"hello"]
+        response = _FakeResponse(chunks)
+        self.assertFalse(monitor._scan_for_keywords(response, ("hello",)))
+        self.assertEqual(response.read, monitor.KEYWORD_SCAN_MAX_BYTES)
+        with mock.patch.object(monitor, "KEYWORD_SCAN_MAX_BYTES", monitor.KEYWORD_SCAN_MAX_BYTES * 2):
+            self.assertTrue(_scan(chunks, ["hello"]))
+
+    def test_non_ascii_keyword_ignores_case(self):
+        self.assertTrue(_scan(["Über uns".encode("utf-8")], ["über"]))
+        self.assertTrue(_scan(["ПРИВЕТ".encode("utf-8")], ["привет"]))
+        self.assertTrue(_scan(["STRASSE".encode("utf-8")], ["Straße"]))
+        data = "Добро пожаловать".encode("utf-8")
+        self.assertTrue(_scan([data[:3], data[3:9], data[9:]], ["ДОБРО ПОЖАЛОВАТЬ"]))
+        self.assertFalse(_scan(["Über uns".encode("utf-8")], ["über alles"]))
+
+    def test_unencodable_keyword_never_matches(self):
+        self.assertFalse(_scan([b"anything"], ["\ud800"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
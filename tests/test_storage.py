@@ -0,0 +1,104 @@
+"""
+站点存储测试：保存与读取往返一致、内容未变时跳过重写、外部修改后重新读取、关键词统一为元组。
+
+运行：python -m unittest discover -s tests
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import storage
+
+SITES = [
+    {"name": "示例站点", "url": "https://example.com"},
+    {"name": "关键词站点", "url": "https://example.org", "keywords": ["正常", "OK"]},
+]
+
+
+class StorageTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "sites.json")
+        patches = [
+            mock.patch.object(storage, "SITES_FILE_PATH", self.path),
+            mock.patch.object(storage, "_last_saved", None),
+            mock.patch.object(storage, "_load_cache", None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _write_externally(self, sites):
+        """模拟外部编辑：直接写入文件，并把修改时间推后以免与上次写入落在同一时间刻度内"""
+        st = os.stat(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(sites, f, ensure_ascii=False)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_round_trip(self):
+        storage.save_sites(SITES)
+        expected = [SITES[0], dict(SITES[1], keywords=("正常", "OK"))]
+        self.assertEqual(storage.load_sites(), expected)
+        # 绕过缓存重新解析文件，结果一致
+        storage._load_cache = None
+        self.assertEqual(storage.load_sites(), expected)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), SITES)
+        # 原子替换后不应残留临时文件
+        self.assertEqual(os.listdir(self._tmp.name), ["sites.json"])
+
+    def test_unchanged_save_is_skipped(self):
+        with mock.patch.object(storage.tempfile, "mkstemp", wraps=tempfile.mkstemp) as mkstemp:
+            storage.save_sites(SITES)
+            storage.save_sites([dict(site) for site in SITES])
+            self.assertEqual(mkstemp.call_count, 1)
+            # 文件被外部修改后，即使内容与上次保存相同也要重新写入
+            self._write_externally([])
+            storage.save_sites(SITES)
+            self.assertEqual(mkstemp.call_count, 2)
+        storage._load_cache = None
+        self.assertEqual(len(storage.load_sites()), 2)
+
+    def test_reload_after_external_edit(self):
+        storage.save_sites(SITES)
+        self.assertEqual(len(storage.load_sites()), 2)
+        edited = [{"name": "新站点", "url": "https://example.net", "keywords": ["up"]}]
+        self._write_externally(edited)
+        # get_cached_sites 不访问磁盘，仍为旧列表；下一次 load_sites 读取外部修改
+        self.assertEqual(len(storage.get_cached_sites()), 2)
+        self.assertEqual(storage.load_sites(), [dict(edited[0], keywords=("up",))])
+        self.assertEqual(storage.get_cached_sites(), storage.load_sites())
+
+    def test_keywords_normalized_to_tuples(self):
+        storage.ensure_sites_file_exists()
+        self._write_externally([
+            {"name": "a", "url": "https://a.example", "keywords": ["x", "y"]},
+            {"name": "b", "url": "https://b.example", "keywords": None},
+            {"name": "c", "url": "https://c.example"},
+        ])
+        sites = storage.load_sites()
+        self.assertEqual(sites[0]["keywords"], ("x", "y"))
+        self.assertEqual(sites[1]["keywords"], ())
+        self.assertNotIn("keywords", sites[2])
+
+    def test_save_does_not_modify_caller_data(self):
+        sites = [dict(site) for site in SITES]
+        storage.save_sites(sites)
+        self.assertEqual(sites[1]["keywords"], ["正常", "OK"])
+        # 修改读取结果不影响缓存
+        loaded = storage.load_sites()
+        loaded.append({"name": "x", "url": "https://x.example"})
+        self.assertEqual(len(storage.get_cached_sites()), 2)
+
+    def test_corrupt_file_loads_empty(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertEqual(storage.load_sites(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+"""
+告警合并发送测试：发送队列已满而被丢弃的警报要记入监控日志。
+
+运行：python -m unittest discover -s tests
+"""
+
+import unittest
+from unittest import mock
+
+import monitor
+import telegram_notifier
+
+
+class FlushPendingAlertsTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(telegram_notifier._pending, {"down": [], "recovery": []})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _flush(self, queued):
+        with mock.patch.object(telegram_notifier, "enqueue_telegram_message", return_value=queued) as enqueue, \
+                mock.patch.object(monitor, "write_log_line") as write_log_line:
+            telegram_notifier._flush_pending_alerts()
+        return enqueue, write_log_line
+
+    def test_dropped_alerts_are_logged(self):
+        telegram_notifier._pending["down"].append(("站点A", "https://a.example", 3, None))
+        telegram_notifier._pending["recovery"].append(("站点B", "https://b.example", 120))
+        enqueue, write_log_line = self._flush(queued=False)
+        self.assertEqual(enqueue.call_count, 2)
+        lines = [c.args[0] for c in write_log_line.call_args_list]
+        self.assertEqual(len(lines), 2)
+        self.assertIn("故障警报被丢弃: 站点A (https://a.example)", lines[0])
+        self.assertIn("恢复通知被丢弃: 站点B (https://b.example)", lines[1])
+
+    def test_queued_alerts_are_not_logged_as_dropped(self):
+        telegram_notifier._pending["down"].append(("站点A", "https://a.example", 3, None))
+        enqueue, write_log_line = self._flush(queued=True)
+        enqueue.assert_called_once()
+        write_log_line.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+getUpdates 偏移量持久化测试：偏移量只对保存它的机器人有效，损坏或过期的文件一律从 0 开始。
+
+运行：python -m unittest discover -s tests
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import telegram_chat_bot
+
+
+class UpdateOffsetTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "telegram_offset.json")
+        patcher = mock.patch.object(telegram_chat_bot, "OFFSET_FILE_PATH", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+    def _write(self, data):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def test_round_trip(self):
+        telegram_chat_bot.save_update_offset(42, 1001)
+        self.assertEqual(telegram_chat_bot.load_update_offset(1001), 42)
+        # 原子替换后不应残留临时文件
+        self.assertEqual(os.listdir(self._tmp.name), ["telegram_offset.json"])
+
+    def test_other_bot_starts_from_zero(self):
+        telegram_chat_bot.save_update_offset(42, 1001)
+        self.assertEqual(telegram_chat_bot.load_update_offset(2002), 0)
+
+    def test_legacy_file_without_bot_id_is_ignored(self):
+        self._write({"offset": 42})
+        self.assertEqual(telegram_chat_bot.load_update_offset(1001), 0)
+
+    def test_expired_offset_is_ignored(self):
+        saved_at = time.time() - telegram_chat_bot._OFFSET_MAX_AGE_SECONDS - 1
+        self._write({"bot_id": 1001, "offset": 42, "saved_at": saved_at})
+        self.assertEqual(telegram_chat_bot.load_update_offset(1001), 0)
+
+    def test_missing_or_corrupt_file(self):
+        self.assertEqual(telegram_chat_bot.load_update_offset(1001), 0)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertEqual(telegram_chat_bot.load_update_offset(1001), 0)
+        self._write([1, 2, 3])
+        self.assertEqual(telegram_chat_bot.load_update_offset(1001), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
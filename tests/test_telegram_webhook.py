@@ -0,0 +1,114 @@
+"""
+Webhook 模式测试：只处理路径与校验令牌都正确的推送；服务无法启动时机器人改用长轮询。
+
+运行：python -m unittest discover -s tests
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+import telegram_chat_bot
+import telegram_webhook
+
+SECRET = "test_secret-123"
+PATH = f"/webhook/{SECRET}"
+
+
+class WebhookHandlerTest(unittest.TestCase):
+    def setUp(self):
+        # 处理函数在应答 200 之后才调用 handle_update，用事件等待调用完成
+        self.handled = threading.Event()
+        patcher = mock.patch.object(telegram_webhook, "handle_update", side_effect=lambda *args: self.handled.set())
+        self.handle_update = patcher.start()
+        self.addCleanup(patcher.stop)
+        handler = telegram_webhook._make_handler("token", PATH, SECRET, set())
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _post(self, path, body, secret=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=2)
+        headers = {"Content-Type": "application/json"}
+        if secret is not None:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+        try:
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        finally:
+            conn.close()
+
+    def test_valid_update_is_handled(self):
+        update = {"update_id": 1, "message": {"chat": {"id": 42}}}
+        self.assertEqual(self._post(PATH, json.dumps(update), SECRET), 200)
+        self.assertTrue(self.handled.wait(2))
+        self.handle_update.assert_called_once_with(update, "token", set())
+
+    def test_wrong_path_or_secret_is_rejected(self):
+        body = json.dumps({"update_id": 1})
+        self.assertEqual(self._post("/webhook/other", body, SECRET), 403)
+        self.assertEqual(self._post(PATH, body, "wrong"), 403)
+        self.assertEqual(self._post(PATH, body), 403)
+        # 非 ASCII 的请求头同样按不匹配处理，而不是让处理线程抛出异常
+        self.assertEqual(self._post(PATH, body, "密钥".encode("utf-8").decode("latin-1")), 403)
+        self.handle_update.assert_not_called()
+
+    def test_invalid_body_is_ignored(self):
+        self.assertEqual(self._post(PATH, "not json", SECRET), 200)
+        self.assertEqual(self._post(PATH, "[1, 2]", SECRET), 200)
+        self.handle_update.assert_not_called()
+
+
+class RunWebhookServerTest(unittest.TestCase):
+    def _run(self, env):
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(telegram_webhook, "set_webhook", return_value=False) as set_webhook:
+            return telegram_webhook.run_webhook_server("token", "https://example.com", set()), set_webhook
+
+    def test_port_in_use_returns_false(self):
+        with socket.socket() as busy:
+            busy.bind(("0.0.0.0", 0))
+            busy.listen()
+            ok, set_webhook = self._run({"UPTIMEGUARD_WEBHOOK_PORT": str(busy.getsockname()[1]),
+                                         "UPTIMEGUARD_WEBHOOK_SECRET": SECRET})
+        self.assertFalse(ok)
+        set_webhook.assert_not_called()
+
+    def test_invalid_secret_returns_false(self):
+        ok, set_webhook = self._run({"UPTIMEGUARD_WEBHOOK_PORT": "0", "UPTIMEGUARD_WEBHOOK_SECRET": "bad secret!"})
+        self.assertFalse(ok)
+        set_webhook.assert_not_called()
+
+    def test_set_webhook_failure_returns_false(self):
+        ok, set_webhook = self._run({"UPTIMEGUARD_WEBHOOK_PORT": "0", "UPTIMEGUARD_WEBHOOK_SECRET": SECRET})
+        self.assertFalse(ok)
+        set_webhook.assert_called_once_with("token", f"https://example.com{PATH}", SECRET)
+
+
+class StartChatBotFallbackTest(unittest.TestCase):
+    def test_falls_back_to_long_polling(self):
+        with mock.patch.object(telegram_chat_bot, "load_config", return_value={"bot_token": "token"}), \
+                mock.patch.object(telegram_chat_bot, "get_bot_info", return_value={"id": 1, "username": "bot"}), \
+                mock.patch.object(telegram_webhook, "get_webhook_url", return_value="https://example.com"), \
+                mock.patch.object(telegram_webhook, "run_webhook_server", return_value=False), \
+                mock.patch.object(telegram_chat_bot, "delete_webhook") as delete_webhook, \
+                mock.patch.object(telegram_chat_bot, "load_update_offset", return_value=0), \
+                mock.patch.object(telegram_chat_bot, "get_updates", side_effect=KeyboardInterrupt) as get_updates, \
+                mock.patch("builtins.print"):
+            telegram_chat_bot.start_chat_bot()
+        delete_webhook.assert_called_once_with("token")
+        get_updates.assert_called_once_with("token", 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
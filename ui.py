@@ -5,46 +5,93 @@ Gradio 界面定义：包含两个主要区域——网站列表与日志信息
 支持在 UI 中对被监控网站进行增删改，并实时查看模拟日志。
 """
 
-from typing import List, Dict, Any
-import time
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import gradio as gr
 from docker_utils import is_docker_environment
 
-from storage import load_sites
-from monitor import latest_status_snapshot, LOG_FILE_PATH
+from storage import get_cached_sites
+from monitor import get_status_cells, get_status_snapshot_version, LOG_FILE_PATH
 from log_manager import get_log_manager
 from telegram_config import load_config, is_telegram_configured
 from telegram_notifier import test_telegram_connection
 from telegram_chat_bot import start_chat_bot, test_chat_bot
 
 
+# Telegram 配置说明（模块级常量，构建界面时不再重复生成）
+_TELEGRAM_HELP_MD = """
+**⚠️ 重要提示：**
+配置参数为只读模式，只能通过以下方式修改：
+
+**1. 直接编辑配置文件：**
+- 文件路径：`docker-compose.yml`
+- 修改后重启应用即可生效
+
+**2. 环境变量配置：**
+- `TELEGRAM_BOT_TOKEN`
+- `TELEGRAM_CHAT_ID`
+- `TELEGRAM_ENABLED=true`
+- `TELEGRAM_FAILURE_THRESHOLD=10`
+
+**如何获取 Bot Token:**
+1. 在 Telegram 中搜索 @BotFather
+2. 发送 `/newbot` 命令
+3. 按提示创建机器人
+4. 复制获得的 Token
+
+**如何获取 Chat ID:**
+**方法一（推荐）:** 使用聊天机器人
+1. 点击 "🤖 启动聊天机器人" 按钮
+2. 向机器人发送任意消息（如"你好"）
+3. Chat ID 会自动获取并保存到配置文件`docker-compose.yml`
+
+**方法二（手动）:** 通过 API
+1. 将机器人添加到群组或私聊
+2. 发送任意消息给机器人
+3. 访问: `https://api.telegram.org/bot<YOUR_BOT_TOKEN>/getUpdates`
+4. 在返回的 JSON 中找到 chat.id
+"""
+
+# 根据环境确定端口：Docker 中使用 7863，本地使用 7864（导入时确定一次）
+IS_DOCKER = is_docker_environment()
+SERVER_PORT = 7863 if IS_DOCKER else 7864
+
+# 尚未检测过的站点：状态列与检测时间列的占位值
+_NO_SNAPSHOT_ROW_TAIL = ("-", "-", "-", "-", 0, "-", "-")
+
+# 聊天机器人后台线程（进程内唯一）；线程退出后允许再次启动
+_chat_bot_thread: Optional[threading.Thread] = None
+_chat_bot_lock = threading.Lock()
+
+# 表格行缓存：(快照版本号, 站点名称与 URL 列表) -> (表格行, 内容摘要)；快照与站点都未变化时直接复用
+_rows_cache: Optional[Tuple[Tuple[Any, ...], List[List[Any]], int]] = None
+
+
 def _sites_to_table_rows(sites: List[Dict[str, Any]]) -> List[List[Any]]:
     """将站点与快照整合为表格需要的二维数组。"""
-    rows: List[List[Any]] = []
-    for site in sites:
-        name = site.get("name", "")
-        url = site.get("url", "")
-        snap = latest_status_snapshot.get(url, {})
-        http_status = snap.get("http_status", "-")
-        html_keyword = snap.get("html_keyword", "-")
-        ssl_status = snap.get("ssl_status", "-")
-        status = snap.get("status", "-")
-        consecutive_failures = snap.get("consecutive_failures", 0)
-        latency = snap.get("latency_ms", "-")
-        ts = snap.get("timestamp")
-        ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "-"
-        rows.append([name, url, http_status, html_keyword, ssl_status,status, consecutive_failures, latency, ts_str])
-    return rows
-
-
-def read_latest_logs(n: int = 200) -> str:
-    """读取日志文件的最新 N 行，并返回拼接后的字符串。"""
-    try:
-        with open(LOG_FILE_PATH, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        return "".join(lines[-n:]) if lines else "(暂无日志)\n"
-    except FileNotFoundError:
-        return "(日志文件未找到)\n"
+    return _table_rows_with_digest(sites)[0]
+
+
+def _table_rows_with_digest(sites: List[Dict[str, Any]]) -> Tuple[List[List[Any]], int]:
+    """返回 (表格行, 内容摘要)；摘要相同即表格内容相同，可用于判断是否需要推送到页面。"""
+    global _rows_cache
+    # 先取版本号再复制快照：期间若有新一轮结果，下次刷新会因版本号变化而重建
+    key = (get_status_snapshot_version(), tuple((site.get("name", ""), site.get("url", "")) for site in sites))
+    cache = _rows_cache
+    if cache is not None and cache[0] == key:
+        return cache[1], cache[2]
+
+    # 每次刷新只复制一次状态列，保证同一张表内的数据来自同一轮轮询；各行直接拼接 monitor 预先算好的列
+    cells_get = get_status_cells().get
+    rows: List[List[Any]] = [
+        [site.get("name", ""), url, *cells_get(url, _NO_SNAPSHOT_ROW_TAIL)]
+        for site in sites
+        for url in (site.get("url", ""),)
+    ]
+    digest = hash(tuple(map(tuple, rows)))
+    _rows_cache = (key, rows, digest)
+    return rows, digest
 
 
 def build_interface() -> gr.Blocks:
@@ -65,7 +112,7 @@ def build_interface() -> gr.Blocks:
 
                 table = gr.Dataframe(
                     headers=["名称", "URL", "HTTP", "关键字", "SSL", "状态", "失败", "延迟(ms)", "检测时间"],
-                    value=_sites_to_table_rows(load_sites()),
+                    value=lambda: _sites_to_table_rows(get_cached_sites()),  # 每次打开页面时取最新（命中行缓存时不重建）
                     datatype=["str", "str", "str", "str", "str", "str", "number", "number", "str"],
                     row_count=(0, "dynamic"),
                     interactive=False,
@@ -76,7 +123,7 @@ def build_interface() -> gr.Blocks:
             with gr.Column(scale=2):
                 gr.Markdown("## 日志信息")
                 log_box = gr.Textbox(
-                    value=get_log_manager(LOG_FILE_PATH).get_history_text(200), 
+                    value=lambda: get_log_manager(LOG_FILE_PATH).get_history_text(200),  # 每次打开页面时读取
                     lines=20, 
                     interactive=False, 
                     label="最新日志" ,
@@ -94,24 +141,21 @@ def build_interface() -> gr.Blocks:
                 )
 
         # Telegram 配置区域
-        with gr.Accordion("🔔 Telegram 通知配置", open=False):
+        with gr.Accordion("🔔 Telegram 通知配置", open=False) as telegram_accordion:
             with gr.Row():
                 with gr.Column(scale=2):
                     gr.Markdown("### 配置参数")
                     
-                    # 加载当前配置
-                    current_config = load_config()
+                    # 配置值在首次展开时再填充：未展开的页面不携带配置（尤其是 Bot Token）
                     
                     telegram_enabled = gr.Checkbox(
                         label="启用 Telegram 通知",
-                        value=current_config["enabled"],
                         interactive=False,
                         info="只读：通过配置文件修改"
                     )
                     
                     bot_token = gr.Textbox(
                         label="Bot Token",
-                        value=current_config["bot_token"],
                         type="password",
                         interactive=False,
                         placeholder="通过配置文件设置",
@@ -120,7 +164,6 @@ def build_interface() -> gr.Blocks:
                     
                     chat_id = gr.Textbox(
                         label="Chat ID",
-                        value=current_config["chat_id"],
                         interactive=False,
                         placeholder="通过配置文件设置",
                         info="只读：通过配置文件修改"
@@ -128,7 +171,6 @@ def build_interface() -> gr.Blocks:
                     
                     failure_threshold = gr.Number(
                         label="连续失败阈值",
-                        value=current_config["failure_threshold"],
                         minimum=1,
                         maximum=100,
                         step=1,
@@ -146,54 +188,18 @@ def build_interface() -> gr.Blocks:
                 
                 with gr.Column(scale=1):
                     gr.Markdown("### 配置说明")
-                    gr.Markdown("""
-                    **⚠️ 重要提示：**
-                    配置参数为只读模式，只能通过以下方式修改：
-                    
-                    **1. 直接编辑配置文件：**
-                    - 文件路径：`docker-compose.yml`
-                    - 修改后重启应用即可生效
-                    
-                    **2. 环境变量配置：**
-                    - `TELEGRAM_BOT_TOKEN`
-                    - `TELEGRAM_CHAT_ID`
-                    - `TELEGRAM_ENABLED=true`
-                    - `TELEGRAM_FAILURE_THRESHOLD=10`
-                    
-                    **如何获取 Bot Token:**
-                    1. 在 Telegram 中搜索 @BotFather
-                    2. 发送 `/newbot` 命令
-                    3. 按提示创建机器人
-                    4. 复制获得的 Token
-                    
-                    **如何获取 Chat ID:**
-                    **方法一（推荐）:** 使用聊天机器人
-                    1. 点击 "🤖 启动聊天机器人" 按钮
-                    2. 向机器人发送任意消息（如"你好"）
-                    3. Chat ID 会自动获取并保存到配置文件`docker-compose.yml`
-                    
-                    **方法二（手动）:** 通过 API
-                    1. 将机器人添加到群组或私聊
-                    2. 发送任意消息给机器人
-                    3. 访问: `https://api.telegram.org/bot<YOUR_BOT_TOKEN>/getUpdates`
-                    4. 在返回的 JSON 中找到 chat.id
-                    """)
+                    gr.Markdown(_TELEGRAM_HELP_MD)
                     
                     config_status = gr.Textbox(
                         label="配置状态",
-                        value="✅ 配置正常" if is_telegram_configured() else "❌ 未配置或配置不完整",
                         interactive=False,
                         lines=2
                     )
                     
 
-        # 回调：刷新日志（优先显示新增队列，其次显示历史）
+        # 回调：刷新日志（显示最近 200 条）
         def on_refresh_logs():
-            manager = get_log_manager(LOG_FILE_PATH)
-            new_text = manager.drain_queue_as_text()
-            if new_text:
-                return new_text + "\n"
-            return manager.get_history_text(200)
+            return get_log_manager(LOG_FILE_PATH).get_history_text(200)
 
         refresh_logs_btn.click(
             fn=on_refresh_logs,
@@ -247,6 +253,28 @@ def build_interface() -> gr.Blocks:
                 "⚠️ 配置现在只能通过环境变量设置，无法在界面中重置"
             )
 
+        # 配置区首次展开时填充当前配置与状态；之后再展开不重发，避免覆盖测试结果等状态信息
+        panel_loaded = gr.State(False)
+
+        def on_telegram_expand(loaded):
+            if loaded:
+                return (gr.skip(),) * 5 + (True,)
+            config = load_config()
+            return (
+                config["enabled"],
+                config["bot_token"],
+                config["chat_id"],
+                config["failure_threshold"],
+                "✅ 配置正常" if is_telegram_configured(config) else "❌ 未配置或配置不完整",
+                True,
+            )
+
+        telegram_accordion.expand(
+            fn=on_telegram_expand,
+            inputs=[panel_loaded],
+            outputs=[telegram_enabled, bot_token, chat_id, failure_threshold, config_status, panel_loaded]
+        )
+
         # 绑定回调函数
         test_connection_btn.click(
             fn=test_telegram_config,
@@ -269,13 +297,13 @@ def build_interface() -> gr.Blocks:
                 if not config.get("bot_token"):
                     return "❌ 请先配置 Bot Token"
                 
-                # 启动聊天机器人（在后台线程中运行）
-                import threading
-                def run_chat_bot():
-                    start_chat_bot()
-                
-                thread = threading.Thread(target=run_chat_bot, daemon=True)
-                thread.start()
+                # 启动聊天机器人（在后台线程中运行）；进程内只保留一个，重复点击不再另起轮询
+                global _chat_bot_thread
+                with _chat_bot_lock:
+                    if _chat_bot_thread is not None and _chat_bot_thread.is_alive():
+                        return "ℹ️ 聊天机器人已在运行"
+                    _chat_bot_thread = threading.Thread(target=start_chat_bot, daemon=True, name="telegram-chat-bot")
+                    _chat_bot_thread.start()
                 
                 return "🤖 聊天机器人已启动！请向机器人发送消息获取 Chat ID"
             except Exception as e:
@@ -306,43 +334,72 @@ def build_interface() -> gr.Blocks:
         
 
         # 周期刷新表格以显示最新快照（每 5 秒）
-        def refresh_table():
-            return _sites_to_table_rows(load_sites())
+        # 每个页面会话各自记录上次推送的内容标识，未变化时返回 gr.skip() 不重发
+        table_sent = gr.State(None)
+        logs_sent = gr.State(None)
+
+        def refresh_table(last_digest):
+            rows, digest = _table_rows_with_digest(get_cached_sites())
+            if digest == last_digest:
+                return gr.skip(), last_digest
+            return rows, digest
 
         timer = gr.Timer(5)
-        timer.tick(fn=refresh_table, inputs=[], outputs=[table])
+        timer.tick(fn=refresh_table, inputs=[table_sent], outputs=[table, table_sent])
 
-        # 日志定时刷新（每 2 秒）
-        def refresh_logs_auto():
+        # 日志推送：每个页面一个异步生成器，在事件循环中等待新日志（不占用工作线程），到达后立即推送最近 200 条
+        async def log_stream(last_version):
+            manager = get_log_manager(LOG_FILE_PATH)
+            while True:
+                version = await manager.wait_for_history_change(last_version, timeout=30)
+                if version == last_version:
+                    # 超时也交还一次控制权：页面已关闭时 Gradio 借此结束该会话的推送
+                    yield gr.skip(), gr.skip()
+                    continue
+                last_version = version
+                yield manager.get_history_text(200), version
+
+        # 常驻生成器会一直占用事件，不能受默认的单并发限制，否则只有第一个页面能收到推送
+        # 推送流常驻运行，隐藏进度提示，否则日志框会一直显示加载状态
+        demo.load(fn=log_stream, inputs=[logs_sent], outputs=[log_box, logs_sent],
+                  concurrency_limit=None, show_progress="hidden")
+
+        # 低频兜底：推送流断开时仍能刷新
+        def refresh_logs_auto(last_version):
             manager = get_log_manager(LOG_FILE_PATH)
-            new_text = manager.drain_queue_as_text()
-            if new_text:
-                return new_text + "\n"
-            return manager.get_history_text(200)
+            version = manager.history_version
+            if version == last_version:
+                return gr.skip(), last_version
+            return manager.get_history_text(200), version
 
-        logs_timer = gr.Timer(2)
-        logs_timer.tick(fn=refresh_logs_auto, inputs=[], outputs=[log_box])
+        logs_timer = gr.Timer(30)
+        logs_timer.tick(fn=refresh_logs_auto, inputs=[logs_sent], outputs=[log_box, logs_sent])
 
     return demo
 
 
-if __name__ == "__main__":
-    demo = build_interface()
+@lru_cache(maxsize=1)
+def get_interface() -> gr.Blocks:
+    """返回进程内共享的界面实例（首次调用时构建，之后复用）。"""
+    return build_interface()
+
 
-    if is_docker_environment():
-        server_port = 7863
-        print("🐳 检测到 Docker 环境，使用端口: 7863")
+def launch_interface() -> None:
+    """按运行环境对应的端口（SERVER_PORT）启动共享的界面实例。"""
+    if IS_DOCKER:
+        print(f"🐳 检测到 Docker 环境，使用端口: {SERVER_PORT}")
     else:
-        server_port = 7864
-        print("💻 检测到本地环境，使用端口: 7864")
-
-    demo.launch(
-            server_name="0.0.0.0",  # 允许外部访问
-            server_port=server_port,# 使用不同端口避免冲突
-            share=False,            # 不创建公共链接
-            debug=True,             # 开启调试模式
-            show_error=True,        # 显示错误信息
-            quiet=False             # 显示启动信息
-        )
+        print(f"💻 检测到本地环境，使用端口: {SERVER_PORT}")
+
+    get_interface().launch(
+        server_name="0.0.0.0",  # 允许外部访问
+        server_port=SERVER_PORT,  # 使用不同端口避免冲突
+        share=False,            # 不创建公共链接
+        debug=True,             # 开启调试模式
+        show_error=True,        # 显示错误信息
+        quiet=False             # 显示启动信息
+    )
 
 
+if __name__ == "__main__":
+    launch_interface()